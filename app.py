@@ -21,10 +21,8 @@ import models
 # This will create the engine
 # TITLE -- coding utf-8 --
 
-if 'dbinitialized' not in st.session_state:
-    # Intenta obtener el estado de la variable, si no existe, la inicializa...
-    models.init_db()
-    st.session_state.dbinitialized = True
+# Inicialización del esquema: una sola vez por proceso del servidor, no por sesión
+models.ensure_db_initialized()
 
 def whereami():
     rutascript = ''
@@ -208,7 +206,9 @@ def app():
         # Solo si main_selected devuelve un valor válido (evita rehidratación asíncrona de iframe en la nube)
         if main_selected and main_selected != st.session_state.get("currentpage"):
             st.session_state.currentpage = main_selected
-            if main_selected == "Remitos":
+            if main_selected == "Codigos de Barra":
+                st.session_state["barcode_sub_nav"] = "Por Artículo"
+            elif main_selected == "Remitos":
                 st.session_state["remitos_sub_nav"] = "Entregas"
             elif main_selected == "Articulos":
                 st.session_state["articulos_sub_nav"] = "ABM Articulos"
@@ -216,19 +216,34 @@ def app():
                 st.session_state["informes_sub_nav"] = "Ganancias por Día"
             elif main_selected == "Backup":
                 st.session_state["backup_sub_nav"] = "Crear Backup"
-            for clave in ['clientes_df', 'articulos_df', 'backup_manager']:
+            for clave in ['clientes_df', 'articulos_df', 'catalogo_idx', 'backup_manager']:
                 st.session_state.pop(clave, None)
 
         mainmenu = st.session_state.get("currentpage", "Codigos de Barra")
 
-        if mainmenu == "Remitos":
-            rem_options = ["Entregas", "Recepciones", "Consultas", "Anulaciones"]
+        if mainmenu == "Codigos de Barra":
+            bar_options = ["Por Artículo", "Por Lote"]
+            cur_bar_sub = st.session_state.get("barcode_sub_nav", "Por Artículo")
+            def_bar_idx = bar_options.index(cur_bar_sub) if cur_bar_sub in bar_options else 0
+
+            sub_selected = option_menu(menu_title="Codigos de Barra",
+                                  options=bar_options,
+                                  icons=["upc", "upc-scan"],
+                                  menu_icon="tag", default_index=def_bar_idx, orientation="vertical",
+                                  styles=submenu_styles,
+                                  key=f"barcode_sub_nav_{menu_v}")
+            if sub_selected:
+                st.session_state["barcode_sub_nav"] = sub_selected
+            submenu = st.session_state.get("barcode_sub_nav", "Por Artículo")
+
+        elif mainmenu == "Remitos":
+            rem_options = ["Entregas", "Recepciones", "Consultas", "Anulaciones", "Por Lote"]
             cur_rem_sub = st.session_state.get("remitos_sub_nav", "Entregas")
             def_rem_idx = rem_options.index(cur_rem_sub) if cur_rem_sub in rem_options else 0
 
             sub_selected = option_menu(menu_title="Remitos",
                                   options=rem_options,
-                                  icons=["file-earmark-plus", "pencil", "search", "file-earmark-minus"],
+                                  icons=["file-earmark-plus", "pencil", "search", "file-earmark-minus", "files"],
                                   menu_icon="folder", default_index=def_rem_idx, orientation="vertical",
                                   styles=submenu_styles,
                                   key=f"remitos_sub_nav_{menu_v}")
@@ -295,7 +310,11 @@ def app():
 
     # Lógica para renderizar contenido según menú y submenú
     if mainmenu == "Codigos de Barra":
-        gen_barcode()
+        if submenu == "Por Lote":
+            from etiquetas_lote import etiquetas_lote
+            etiquetas_lote()
+        else:
+            gen_barcode()
 
     elif mainmenu == "Clientes":
         clientes_crud()
@@ -320,6 +339,9 @@ def app():
             remitos_consultas()
         elif submenu == "Anulaciones":
             remitos_anulaciones()
+        elif submenu == "Por Lote":
+            from remitos_lote import remitos_lote
+            remitos_lote()
 
     elif mainmenu == "Informes":
         st.title(config.TITULO_APP)
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+Índice en memoria del catálogo de clientes y artículos para las pantallas de carga de remitos.
+
+Se construye una sola vez por versión del catálogo (ver models.get_catalog) y es de solo
+lectura, por lo que todas las sesiones pueden compartir la misma instancia.
+"""
+import pandas as pd
+
+def format_articulo_option(nro_articulo, descripcion) -> str:
+    """Texto que muestran los selectbox de artículos: 'NRO - Descripción'."""
+    return f"{nro_articulo} - {descripcion}"
+
+def format_cliente_option(razon_social, boca) -> str:
+    """Texto que muestran los selectbox de clientes: 'Razón Social  |  Boca: N'."""
+    if pd.notna(boca):
+        return f"{razon_social}  |  Boca: {int(boca)}"
+    return razon_social
+
+class CatalogoIndex:
+    """
+    Búsquedas O(1) sobre el catálogo:
+    - artículos por nro_articulo, por texto de opción y por id.
+    - clientes por texto de opción y por id.
+    Las filas son dicts con las mismas claves que las columnas de get_clients_and_articles.
+    """
+
+    def __init__(self, clientes_df: pd.DataFrame, articulos_df: pd.DataFrame):
+        self.articulos = articulos_df.to_dict("records")
+        self.opciones_articulos = [format_articulo_option(a["nro_articulo"], a["descripcion"]) for a in self.articulos]
+
+        self._articulo_por_nro = {}
+        self._articulo_por_opcion = {}
+        self._opcion_por_nro = {}
+        for opcion, art in zip(self.opciones_articulos, self.articulos):
+            # Ante duplicados gana la primera fila, igual que el .iloc[0] que reemplaza
+            self._articulo_por_nro.setdefault(art["nro_articulo"], art)
+            self._opcion_por_nro.setdefault(art["nro_articulo"], opcion)
+            self._articulo_por_opcion.setdefault(opcion, art)
+        self._articulo_por_id = {a["id"]: a for a in self.articulos}
+
+        self.clientes = clientes_df.to_dict("records")
+        self.opciones_clientes = [format_cliente_option(c["razon_social"], c["boca"]) for c in self.clientes]
+        self._cliente_por_opcion = {}
+        for opcion, cli in zip(self.opciones_clientes, self.clientes):
+            self._cliente_por_opcion.setdefault(opcion, cli)
+        self._cliente_por_id = {c["id"]: c for c in self.clientes}
+
+    def articulo_por_nro(self, nro_articulo):
+        """Fila del artículo con ese nro_articulo, o None."""
+        return self._articulo_por_nro.get(nro_articulo)
+
+    def articulo_por_opcion(self, opcion):
+        """Fila del artículo elegido en el selectbox, o None."""
+        return self._articulo_por_opcion.get(opcion)
+
+    def articulo_por_id(self, articulo_id):
+        """Fila del artículo con ese id, o None."""
+        return self._articulo_por_id.get(articulo_id)
+
+    def opcion_de_nro(self, nro_articulo):
+        """Texto de opción del selectbox para un nro_articulo, o None."""
+        return self._opcion_por_nro.get(nro_articulo)
+
+    def cliente_por_opcion(self, opcion):
+        """Fila del cliente elegido en el selectbox, o None."""
+        return self._cliente_por_opcion.get(opcion)
+
+    def cliente_por_id(self, cliente_id):
+        """Fila del cliente con ese id, o None."""
+        return self._cliente_por_id.get(cliente_id)
@@ -27,6 +27,7 @@ def init_clientes_articulos():
             st.session_state.porc_dto = None
         del st.session_state.clientes_df
         del st.session_state.articulos_df
+        del st.session_state.catalogo_idx
     except:
         pass
 
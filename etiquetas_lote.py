@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+import os
+import math
+import pandas as pd
+import streamlit as st
+from gen_barcode import generate_pdf_label_sheets, labels_from_remito, labels_from_list, format_label_price, LABELS_PER_PAGE, LABEL_MAX_QUANTITY
+import config
+
+def _leer_lista(archivo):
+    """
+    Pares (código, cantidad) de un Excel o CSV: primera columna el código y segunda la
+    cantidad de etiquetas. Las filas sin cantidad numérica (como el encabezado) se ignoran.
+    """
+    if archivo.name.lower().endswith((".xlsx", ".xls")):
+        df = pd.read_excel(archivo, header=None, dtype=str)
+    else:
+        df = pd.read_csv(archivo, header=None, dtype=str, sep=None, engine="python")
+    if df.shape[1] < 2:
+        raise ValueError("La lista debe tener dos columnas: código y cantidad")
+
+    cantidades = pd.to_numeric(df[1].str.strip(), errors="coerce")
+    validas = cantidades.notna() & df[0].notna()
+    return list(zip(df.loc[validas, 0].str.strip(), cantidades[validas].astype(int)))
+
+def etiquetas_lote():
+    st.title(config.TITULO_APP)
+    st.header("Etiquetas por Lote")
+    st.markdown("`Genera en un solo PDF las etiquetas de varios artículos, seguidas en la hoja de 6x13.`")
+
+    origen = st.radio("Etiquetas de:", ["Remito", "Lista de artículos"], horizontal=True)
+    if origen == "Remito":
+        remito_id = st.number_input("Número de remito", min_value=1, step=1, value=None,
+                                    help="Una etiqueta por cada unidad entregada, con el precio del remito.")
+    else:
+        archivo = st.file_uploader("Lista de códigos y cantidades (Excel o CSV)", type=["xlsx", "csv", "txt"],
+                                   help="Primera columna: código del artículo; segunda: cantidad de etiquetas. "
+                                        "El precio se toma del maestro de artículos.")
+
+    if st.button("🏷️ Generar PDF de etiquetas", type="primary", width="stretch"):
+        st.session_state.pop("etiquetas_lote_result", None)
+        try:
+            if origen == "Remito":
+                if not remito_id:
+                    st.warning("⚠️ Ingrese el número de remito")
+                    return
+                labels, faltantes, excedidas = labels_from_remito(int(remito_id)), [], []
+                nombre = f"etiquetas_remito_{int(remito_id)}"
+            else:
+                if archivo is None:
+                    st.warning("⚠️ Suba la lista de códigos y cantidades")
+                    return
+                labels, faltantes, excedidas = labels_from_list(_leer_lista(archivo))
+                nombre = f"etiquetas_{os.path.splitext(archivo.name)[0]}"
+        except Exception as e:
+            st.error(f"❌ Error leyendo las etiquetas: {e}")
+            return
+
+        total = sum(cantidad for _, _, cantidad in labels)
+        st.session_state.etiquetas_lote_result = {
+            "data": generate_pdf_label_sheets(labels).getvalue() if total else None,
+            "filename": f"{nombre}.pdf",
+            "resumen": pd.DataFrame(
+                [(codigo, format_label_price(precio), cantidad) for codigo, precio, cantidad in labels],
+                columns=["Código", "Precio", "Etiquetas"]
+            ),
+            "total": total,
+            "faltantes": faltantes,
+            "excedidas": excedidas,
+        }
+
+    resultado = st.session_state.get("etiquetas_lote_result")
+    if resultado:
+        if resultado["faltantes"]:
+            with st.expander(f"⚠️ {len(resultado['faltantes'])} código(s) no existen en el maestro de artículos"):
+                st.markdown(", ".join(f"`{codigo}`" for codigo in resultado["faltantes"]))
+        if resultado["excedidas"]:
+            with st.expander(f"⚠️ {len(resultado['excedidas'])} fila(s) superan las {LABEL_MAX_QUANTITY} etiquetas por artículo y no se imprimen"):
+                st.markdown(", ".join(f"`{codigo}` ({cantidad})" for codigo, cantidad in resultado["excedidas"]))
+        if not resultado["total"]:
+            st.warning("⚠️ No hay etiquetas para imprimir")
+        else:
+            hojas = math.ceil(resultado["total"] / LABELS_PER_PAGE)
+            st.success(f"✅ {resultado['total']} etiqueta(s) de {resultado['resumen']['Código'].nunique()} artículo(s) en {hojas} hoja(s)")
+            st.dataframe(resultado["resumen"], hide_index=True, width="stretch")
+            st.download_button(
+                label=f"📥 Descargar {resultado['filename']}",
+                width="stretch",
+                data=resultado["data"],
+                file_name=resultado["filename"],
+                mime="application/pdf"
+            )
+
+    st.markdown(f"`{config.FOOTER_APP}`")
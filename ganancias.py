@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+Cálculo vectorizado de vendidos, venta y utilidad por ítem de remito, compartido por
+los Informes (info_ganancias, info_empresas e info_articulos).
+
+Regla de negocio (por ítem):
+    vendidos    = max(0, entregados - devueltos)
+    p_dto       = precio_real * (1 - porc_dto / 100)
+    venta_total = p_dto * vendidos            (0 si precio_real <= 0 o vendidos == 0)
+    utilidad    = (p_dto - costo) * vendidos  (0 si precio_real <= 0 o vendidos == 0)
+Los valores nulos se toman como 0.
+
+Uso por línea de comandos:
+    python ganancias.py   -> compara el cálculo vectorizado contra el cálculo fila a fila
+"""
+import numpy as np
+import pandas as pd
+
+# La misma regla expresada en SQL, sobre los alias r (remitos), c (clientes),
+# ri (remito_items) y a (articulos). La usan informes y ventas_diarias.
+VENDIDOS_SQL = "GREATEST(COALESCE(ri.entregados, 0) - COALESCE(ri.devueltos, 0), 0)"
+P_REAL_SQL = "CAST(COALESCE(ri.precio_real_item, a.precio_real, 0) AS DOUBLE PRECISION)"
+P_DTO_SQL = f"({P_REAL_SQL} * (1.0 - CAST(COALESCE(r.porc_dto, c.porc_dto, 0) AS DOUBLE PRECISION) / 100.0))"
+APLICA_SQL = f"({P_REAL_SQL} > 0 AND {VENDIDOS_SQL} > 0)"
+VENTA_SQL = f"CASE WHEN {APLICA_SQL} THEN {P_DTO_SQL} * {VENDIDOS_SQL} ELSE 0 END"
+UTILIDAD_SQL = (
+    f"CASE WHEN {APLICA_SQL} "
+    f"THEN ({P_DTO_SQL} - CAST(COALESCE(a.costo, 0) AS DOUBLE PRECISION)) * {VENDIDOS_SQL} ELSE 0 END"
+)
+
+def _columna(df: pd.DataFrame, nombre: str) -> np.ndarray:
+    """Columna como array float64 con los nulos reemplazados por 0."""
+    return np.nan_to_num(pd.to_numeric(df[nombre], errors="coerce").to_numpy(dtype="float64", na_value=np.nan), nan=0.0)
+
+def calcular_ganancias(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Agrega a df (in place) las columnas vendidos, venta_total y utilidad a partir de
+    entregados, devueltos, precio_real, porc_dto y costo. Devuelve el mismo DataFrame.
+    """
+    entregados = np.trunc(_columna(df, "entregados"))
+    devueltos = np.trunc(_columna(df, "devueltos"))
+    p_real = _columna(df, "precio_real")
+    porc_dto = _columna(df, "porc_dto")
+    costo = _columna(df, "costo")
+
+    vendidos = np.maximum(entregados - devueltos, 0.0)
+    p_dto = p_real * (1.0 - (porc_dto / 100.0))
+    aplica = (p_real > 0) & (vendidos > 0)
+
+    df["vendidos"] = vendidos.astype("int64")
+    df["venta_total"] = np.where(aplica, p_dto * vendidos, 0.0)
+    df["utilidad"] = np.where(aplica, (p_dto - costo) * vendidos, 0.0)
+    return df
+
+def _calcular_item_fila(row):
+    """Cálculo original fila a fila; se conserva solo como referencia para la verificación."""
+    entregados = int(row["entregados"]) if pd.notna(row["entregados"]) else 0
+    devueltos = int(row["devueltos"]) if pd.notna(row["devueltos"]) else 0
+    vendidos = max(0, entregados - devueltos)
+
+    p_real = float(row["precio_real"]) if pd.notna(row["precio_real"]) else 0.0
+    porc_dto = float(row["porc_dto"]) if pd.notna(row["porc_dto"]) else 0.0
+    costo = float(row["costo"]) if pd.notna(row["costo"]) else 0.0
+
+    if p_real > 0 and vendidos > 0:
+        p_dto = p_real * (1.0 - (porc_dto / 100.0))
+        venta_total = p_dto * vendidos
+        utilidad = (p_dto - costo) * vendidos
+    else:
+        venta_total = 0.0
+        utilidad = 0.0
+
+    return pd.Series({"vendidos": vendidos, "venta_total": venta_total, "utilidad": utilidad})
+
+def verificar_equivalencia(df: pd.DataFrame) -> bool:
+    """True si calcular_ganancias coincide con el cálculo fila a fila sobre df."""
+    esperado = df.apply(_calcular_item_fila, axis=1)
+    obtenido = calcular_ganancias(df.copy())
+    return (
+        np.array_equal(obtenido["vendidos"].to_numpy(), esperado["vendidos"].to_numpy())
+        and np.allclose(obtenido["venta_total"].to_numpy(), esperado["venta_total"].to_numpy(), rtol=0, atol=1e-9)
+        and np.allclose(obtenido["utilidad"].to_numpy(), esperado["utilidad"].to_numpy(), rtol=0, atol=1e-9)
+    )
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    n = 20000
+    muestra = pd.DataFrame({
+        "entregados": rng.integers(0, 20, n).astype("float64"),
+        "devueltos": rng.integers(0, 25, n).astype("float64"),
+        "precio_real": rng.choice([0.0, -5.0, 1500.0, 2399.99, 12000.5], n),
+        "porc_dto": rng.choice([0.0, 10.0, 25.0, 33.3], n),
+        "costo": rng.uniform(0, 8000, n).round(2),
+    })
+    # Nulos esparcidos en todas las columnas de entrada
+    for col in muestra.columns:
+        muestra.loc[rng.random(n) < 0.03, col] = np.nan
+
+    ok = verificar_equivalencia(muestra)
+    print(f"Equivalencia sobre {n} filas: {'OK' if ok else 'DIFERENCIAS'}")
+    raise SystemExit(0 if ok else 1)
@@ -7,13 +7,13 @@ con una estructura de navegación en el sidebar.
 """
 import streamlit as st
 import streamlit.components.v1 as components
-import pandas as pd
 import barcode
 from barcode.writer import ImageWriter
 from PIL import Image
 import io
 import os
 import locale
+from collections import Counter
 
 # Importamos las librerías necesarias para la generación del PDF
 from reportlab.lib.pagesizes import A4
@@ -40,19 +40,16 @@ def load_codes_from_db():
     """
     try:
         articulos_df = models.get_all_articulos()
-        codes_data = []
-
-        if not articulos_df.empty:
-            for index, row in articulos_df.iterrows():
-                # Asegura que el formato sea el mismo que el del Excel
-                codes_data.append({
-                    "code": str(row['nro_articulo']),
-                    "description": str(row['descripcion']) if pd.notnull(row['descripcion']) else "",
-                    "price": str(int(row['precio_real'])) if pd.notnull(row['precio_real']) else "0"
-                })
-        
-        return codes_data
-        
+        # Asegura que el formato sea el mismo que el del Excel
+        return [
+            {"code": code, "description": description, "price": price}
+            for code, description, price in zip(
+                articulos_df['nro_articulo'].astype(str),
+                articulos_df['descripcion'].fillna("").astype(str),
+                articulos_df['precio_real'].fillna(0).astype(int).astype(str),
+            )
+        ]
+
     except Exception as e:
         st.error(f"Ocurrió un error al leer la base de datos: {e}")
         return []
@@ -81,143 +78,212 @@ def generate_barcode(code_to_generate: str):
         return None
     
 
-def generate_pdf_labels(code: str, price: str, quantity: int):
+# --- Hoja de etiquetas: grilla de 6 columnas y 13 filas en A4 ---
+LABEL_COLS = 6
+LABEL_ROWS = 13
+LABELS_PER_PAGE = LABEL_COLS * LABEL_ROWS
+# Topes de etiquetas: por artículo (el mismo de la página de un artículo) y por PDF
+LABEL_MAX_QUANTITY = 4000
+LABEL_MAX_TOTAL = 20000
+
+# Dimensiones de la etiqueta ajustadas para 6x13 - REDUCIDAS
+LABEL_WIDTH = 32.0 * mm  # Reducido de 38.4mm
+LABEL_HEIGHT = 18.5 * mm  # Reducido de 23.0mm
+LABEL_COL_SPACING = 1.5 * mm  # Reducido de 2.0mm
+LABEL_ROW_SPACING = 1.0 * mm  # Nuevo espaciado entre filas
+
+# Dimensiones y espaciado de los elementos de la etiqueta - AJUSTADOS
+LABEL_BARCODE_HEIGHT = 5 * mm  # Reducido de 6mm
+LABEL_BAR_WIDTH = 0.22 * mm  # Barras más delgadas
+LABEL_CODE_FONT_SIZE = 5  # Reducido de 6
+LABEL_PRICE_FONT_SIZE = 14  # Reducido de 16
+LABEL_SPACE_BARCODE_CODE = 0.3 * mm  # Reducido de 0.5mm
+LABEL_SPACE_CODE_PRICE = 0.3 * mm  # Reducido de 0.5mm
+# Altura vertical de los elementos para calcular el centrado - AJUSTADAS
+LABEL_TEXT_HEIGHT_CODE = 1.8 * mm
+LABEL_TEXT_HEIGHT_PRICE = 4.9 * mm
+
+LABEL_GUIDE_LENGTH = 3 * mm  # Longitud de las marcas de corte
+LABEL_LINE_WIDTH = 0.25
+
+def label_grid():
     """
-    Genera un archivo PDF con etiquetas de código de barras,
-    optimizado para 6 columnas y 13 filas en una hoja A4.
-    Espacios reducidos para maximizar el aprovechamiento de la hoja.
-
-    El contenido de cada etiqueta está centrado verticalmente para
-    lograr una apariencia más equilibrada.
+    Posiciones (x, y) de la esquina inferior izquierda de cada etiqueta de la hoja, por
+    filas de izquierda a derecha, con la grilla centrada en la página A4.
     """
-    buffer = io.BytesIO()
-    c = canvas.Canvas(buffer, pagesize=A4)
-    
-    # Dimensiones de la hoja A4 en milímetros
     page_width, page_height = A4
-
-    # Configuración de la grilla de etiquetas - CAMBIADO a 6x13
-    num_cols = 6
-    num_rows = 13
-    
-    # Dimensiones de la etiqueta ajustadas para 6x13 - REDUCIDAS
-    label_width = 32.0 * mm  # Reducido de 38.4mm
-    label_height = 18.5 * mm  # Reducido de 23.0mm
-    
-    col_spacing = 1.5 * mm  # Reducido de 2.0mm
-    row_spacing = 1.0 * mm  # Nuevo espaciado entre filas
-    
-    # Calcular márgenes de la página para centrar la grilla
-    total_block_width = (num_cols * label_width) + ((num_cols - 1) * col_spacing)
-    total_block_height = (num_rows * label_height) + ((num_rows - 1) * row_spacing)
-    
+    total_block_width = (LABEL_COLS * LABEL_WIDTH) + ((LABEL_COLS - 1) * LABEL_COL_SPACING)
+    total_block_height = (LABEL_ROWS * LABEL_HEIGHT) + ((LABEL_ROWS - 1) * LABEL_ROW_SPACING)
     margin_left = (page_width - total_block_width) / 2
     margin_top = (page_height - total_block_height) / 2
 
-    # Dimensiones y espaciado de los elementos de la etiqueta - AJUSTADOS
-    barcode_height = 5 * mm  # Reducido de 6mm
-    code_font_size = 5  # Reducido de 6
-    price_font_size = 14  # Reducido de 16
+    return [
+        (margin_left + col * (LABEL_WIDTH + LABEL_COL_SPACING),
+         page_height - margin_top - (row + 1) * (LABEL_HEIGHT + LABEL_ROW_SPACING) + LABEL_ROW_SPACING)
+        for row in range(LABEL_ROWS) for col in range(LABEL_COLS)
+    ]
 
-    space_between_barcode_and_code = 0.3 * mm  # Reducido de 0.5mm
-    space_between_code_and_price = 0.3 * mm  # Reducido de 0.5mm
+def format_label_price(price) -> str:
+    """Precio de la etiqueta: $12.500"""
+    return f"${int(float(price)):,d}".replace(",", ".")
 
-    # Altura vertical de los elementos para calcular el centrado - AJUSTADAS
-    text_height_code = 1.8 * mm  # Reducido
-    text_height_price = 4.9 * mm  # Reducido
-    
-    total_element_height = (barcode_height + text_height_code + text_height_price +
-                            space_between_barcode_and_code + space_between_code_and_price)
-    
-    vertical_margin = (label_height - total_element_height) / 2
-
-    c.setFont("Helvetica", code_font_size)
-    c.setLineWidth(0.25)
-
-    # Dibuja la grilla completa una vez por página
-    x_start_grid = margin_left
-    y_start_grid = page_height - margin_top - total_block_height
-    x_end_grid = margin_left + total_block_width
-    y_end_grid = page_height - margin_top
-
-    def draw_cutting_guides():
-        """
-        Dibuja pequeñas marcas de referencia en los bordes para guiar el corte
-        en lugar de líneas completas que atraviesen toda la hoja.
-        """
-        mark_length = 3 * mm  # Longitud de las marcas de corte
-        
-        # Marcas horizontales (para cortes verticales) - en bordes superior e inferior
-        for i in range(num_cols + 1):
-            if i < num_cols:
-                x_mark = x_start_grid + i * (label_width + col_spacing)
-            else:
-                x_mark = x_start_grid + total_block_width
-            
-            # Marca superior
-            c.line(x_mark, y_end_grid, x_mark, y_end_grid + mark_length)
-            # Marca inferior  
-            c.line(x_mark, y_start_grid, x_mark, y_start_grid - mark_length)
-        
-        # Marcas verticales (para cortes horizontales) - en bordes izquierdo y derecho
-        for i in range(num_rows + 1):
-            y_mark = y_end_grid - i * (label_height + row_spacing)
-            if i == num_rows:  # Última línea
-                y_mark = y_start_grid
-            
-            # Marca izquierda
-            c.line(x_start_grid - mark_length, y_mark, x_start_grid, y_mark)
-            # Marca derecha
-            c.line(x_end_grid, y_mark, x_end_grid + mark_length, y_mark)
+def define_label_form(c, name: str, code: str, price):
+    """
+    Define en el PDF un form XObject con una etiqueta (código de barras, código y precio),
+    con origen en su esquina inferior izquierda. Las barras se dibujan una sola vez y cada
+    etiqueta de la hoja es solo una referencia al form.
+
+    El contenido de la etiqueta está centrado verticalmente para lograr una apariencia
+    más equilibrada.
+    """
+    total_element_height = (LABEL_BARCODE_HEIGHT + LABEL_TEXT_HEIGHT_CODE + LABEL_TEXT_HEIGHT_PRICE +
+                            LABEL_SPACE_BARCODE_CODE + LABEL_SPACE_CODE_PRICE)
+    vertical_margin = (LABEL_HEIGHT - total_element_height) / 2
+    price_string = format_label_price(price)
+
+    c.beginForm(name, lowerx=0, lowery=0, upperx=LABEL_WIDTH, uppery=LABEL_HEIGHT)
+
+    # 1. Código de barras
+    y_barcode = LABEL_HEIGHT - vertical_margin - LABEL_BARCODE_HEIGHT
+    barcode_obj = code128.Code128(code, barWidth=LABEL_BAR_WIDTH, barHeight=LABEL_BARCODE_HEIGHT)
+    barcode_obj.drawOn(c, (LABEL_WIDTH - barcode_obj.width) / 2, y_barcode)
+
+    # 2. Código alfanumérico
+    c.setFont("Helvetica", LABEL_CODE_FONT_SIZE)
+    y_text = y_barcode - LABEL_SPACE_BARCODE_CODE - LABEL_TEXT_HEIGHT_CODE
+    c.drawCentredString(LABEL_WIDTH / 2, y_text, code)
 
-    draw_cutting_guides()
+    # 3. Precio
+    c.setFont("Helvetica", LABEL_PRICE_FONT_SIZE)
+    y_price = y_text - LABEL_SPACE_CODE_PRICE - LABEL_TEXT_HEIGHT_PRICE
+    c.drawCentredString(LABEL_WIDTH / 2, y_price, price_string)
 
-    for i in range(quantity):
-        # Avanza a la siguiente página si se alcanza el límite
-        if i > 0 and i % (num_rows * num_cols) == 0:
+    c.endForm()
+
+def define_cutting_guides_form(c, name: str = "guias_corte"):
+    """
+    Define el form XObject con las marcas de referencia de los bordes para guiar el corte,
+    en lugar de líneas completas que atraviesen toda la hoja.
+    """
+    grid = label_grid()
+    x_start_grid = grid[0][0]
+    x_end_grid = grid[LABEL_COLS - 1][0] + LABEL_WIDTH
+    y_end_grid = grid[0][1] + LABEL_HEIGHT
+    y_start_grid = grid[-1][1]
+
+    c.beginForm(name)
+    c.setLineWidth(LABEL_LINE_WIDTH)
+    # Marcas horizontales (para cortes verticales) - en bordes superior e inferior
+    for i in range(LABEL_COLS + 1):
+        x_mark = grid[i][0] if i < LABEL_COLS else x_end_grid
+        c.line(x_mark, y_end_grid, x_mark, y_end_grid + LABEL_GUIDE_LENGTH)
+        c.line(x_mark, y_start_grid, x_mark, y_start_grid - LABEL_GUIDE_LENGTH)
+
+    # Marcas verticales (para cortes horizontales) - en bordes izquierdo y derecho
+    for i in range(LABEL_ROWS + 1):
+        y_mark = y_end_grid - i * (LABEL_HEIGHT + LABEL_ROW_SPACING) if i < LABEL_ROWS else y_start_grid
+        c.line(x_start_grid - LABEL_GUIDE_LENGTH, y_mark, x_start_grid, y_mark)
+        c.line(x_end_grid, y_mark, x_end_grid + LABEL_GUIDE_LENGTH, y_mark)
+    c.endForm()
+    return name
+
+def place_form(c, name: str, x: float, y: float):
+    """Dibuja el form XObject con su origen en (x, y)."""
+    c.saveState()
+    c.translate(x, y)
+    c.doForm(name)
+    c.restoreState()
+
+def generate_pdf_labels(code: str, price: str, quantity: int):
+    """
+    Genera un archivo PDF con etiquetas de código de barras,
+    optimizado para 6 columnas y 13 filas en una hoja A4.
+    Espacios reducidos para maximizar el aprovechamiento de la hoja.
+    """
+    return generate_pdf_label_sheets([(code, price, quantity)])
+
+def generate_pdf_label_sheets(labels):
+    """
+    Genera el PDF de etiquetas de varios artículos: labels es [(código, precio, cantidad)]
+    y las etiquetas se acomodan seguidas en la grilla de 6x13, pasando de hoja al llenarla.
+
+    Cada artículo distinto (código y precio) se dibuja una sola vez como form XObject y cada
+    celda de la grilla lo referencia; las hojas que se repiten iguales (por ejemplo, muchas
+    de un mismo artículo) son a su vez un único form, una sola referencia por página.
+    """
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A4)
+    grid = label_grid()
+
+    label_forms = {}
+    sequence = []
+    for code, price, quantity in labels:
+        key = (str(code), format_label_price(price))
+        if key not in label_forms:
+            label_forms[key] = f"etiqueta_{len(label_forms)}"
+            define_label_form(c, label_forms[key], key[0], price)
+        sequence.extend([label_forms[key]] * int(quantity))
+
+    pages = [tuple(sequence[i:i + LABELS_PER_PAGE]) for i in range(0, len(sequence), LABELS_PER_PAGE)] or [()]
+    repeated = {page for page, count in Counter(pages).items() if count > 1}
+    guides = define_cutting_guides_form(c)
+
+    def draw_sheet(page):
+        c.doForm(guides)
+        for (x, y), name in zip(grid, page):
+            place_form(c, name, x, y)
+
+    sheet_forms = {}
+    for i, page in enumerate(pages):
+        if i:
             c.showPage()
-            c.setFont("Helvetica", code_font_size)
-            c.setLineWidth(0.25)
-            draw_cutting_guides()
-        
-        col = (i % (num_rows * num_cols)) % num_cols
-        row = (i % (num_rows * num_cols)) // num_cols
-        
-        x_base = margin_left + col * (label_width + col_spacing)
-        y_base = page_height - margin_top - (row + 1) * (label_height + row_spacing) + row_spacing
-
-        # Posiciona los elementos verticalmente, centrándolos en la etiqueta
-        y_barcode = y_base + label_height - vertical_margin - barcode_height
-        
-        # 1. Dibujar el código de barras
-        barcode_obj = code128.Code128(code, barWidth=0.22*mm, barHeight=barcode_height)  # Barras más delgadas
-        barcode_width = barcode_obj.width
-        x_centered_barcode = x_base + (label_width - barcode_width) / 2
-        
-        barcode_obj.drawOn(c, x_centered_barcode, y_barcode)
-
-        # 2. Dibujar el código alfanumérico
-        c.setFont("Helvetica", code_font_size)
-        text_width = c.stringWidth(code, "Helvetica", code_font_size)
-        x_centered_text = x_base + (label_width - text_width) / 2
-        y_text = y_barcode - space_between_barcode_and_code - text_height_code
-        
-        c.drawString(x_centered_text, y_text, code)
-        
-        # 3. Dibujar el precio
-        c.setFont("Helvetica", price_font_size)
-        price_string = f"${int(float(price)):,d}".replace(",", ".")
-
-        price_width = c.stringWidth(price_string, "Helvetica", price_font_size)
-        x_centered_price = x_base + (label_width - price_width) / 2
-        y_price = y_text - space_between_code_and_price - text_height_price
-        
-        c.drawString(x_centered_price, y_price, price_string)
-            
+        if page in repeated:
+            if page not in sheet_forms:
+                sheet_forms[page] = f"hoja_{len(sheet_forms)}"
+                c.beginForm(sheet_forms[page])
+                draw_sheet(page)
+                c.endForm()
+            c.doForm(sheet_forms[page])
+        else:
+            draw_sheet(page)
+
     c.save()
     buffer.seek(0)
     return buffer
 
+def labels_from_remito(remito_id: int):
+    """
+    Etiquetas de un remito: [(código, precio, cantidad)] con una etiqueta por unidad
+    entregada de cada item, en el orden del remito y con el precio del remito.
+    """
+    data = models.get_remito_snapshot(remito_id)
+    if not data:
+        raise ValueError(f"Remito {remito_id} no encontrado")
+    items = data["items"]
+    items = items[items["entregados"].fillna(0) > 0]
+    return list(zip(items["nro_articulo"].astype(str),
+                    items["precio_real"].fillna(0).astype(float),
+                    items["entregados"].astype(int)))
+
+def labels_from_list(pairs):
+    """
+    Etiquetas de una lista [(código, cantidad)] con el precio del maestro de artículos,
+    leído en una sola consulta. Retorna ([(código, precio, cantidad)], [códigos que no existen],
+    [(código, cantidad)] de las filas que superan LABEL_MAX_QUANTITY, que no se imprimen).
+    Error si el total supera LABEL_MAX_TOTAL.
+    """
+    # Mismo formato con que update_art guarda nro_articulo (sin espacios y en mayúsculas)
+    pairs = [(str(code).strip().upper(), int(quantity)) for code, quantity in pairs if int(quantity) > 0]
+    excedidas = [(code, quantity) for code, quantity in pairs if quantity > LABEL_MAX_QUANTITY]
+    pairs = [(code, quantity) for code, quantity in pairs if quantity <= LABEL_MAX_QUANTITY]
+    precios = models.get_precios_articulos({code for code, _ in pairs})
+    labels = [(code, precios[code], quantity) for code, quantity in pairs if code in precios]
+    faltantes = list(dict.fromkeys(code for code, _ in pairs if code not in precios))
+    total = sum(quantity for _, _, quantity in labels)
+    if total > LABEL_MAX_TOTAL:
+        raise ValueError(f"La lista suma {total} etiquetas; el máximo por PDF es {LABEL_MAX_TOTAL}")
+    return labels, faltantes, excedidas
+
 # --- Lógica de las páginas de la aplicación ---
 def gen_barcode():
 
@@ -270,7 +336,7 @@ def gen_barcode():
                 quantity = st.number_input(
                     "Cantidad de etiquetas (78 p/página en A4):",
                     min_value=1,
-                    max_value=4000,
+                    max_value=LABEL_MAX_QUANTITY,
                     value=78,
                     step=1,
                     help="Si selecciona menos de 78, quedarán etiquetas en blanco. Mayor cantidad imprime más páginas."
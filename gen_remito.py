@@ -1,78 +1,309 @@
 import os
 import io
+import re
+import zipfile
+import threading
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
 import streamlit as st
-from datetime import datetime
+from datetime import datetime, timezone
+from xml.sax.saxutils import escape
 import pandas as pd
 from openpyxl import load_workbook
-from models import get_remito_completo
+from openpyxl.cell import Cell, MergedCell
+from openpyxl.compat import safe_string
+from models import get_remito_snapshot
 import config
 
-def gen_remito(remito_id: int, is_retiro=False) -> io.BytesIO:
+# Plantilla del remito y celdas que completa gen_remito: cabecera, items (filas 10 a 44;
+# la columna C tiene la fórmula de la plantilla) y fechas de entrega y retiro
+REMITO_TEMPLATE_PATH = os.path.join(os.path.dirname(__file__), "DOCS", "REMITO_Master.xlsx")
+REMITO_ITEM_FIRST_ROW = 10
+REMITO_SLOTS = (
+    ["A3", "A5", "H5", "H8", "A6", "G6", "H2"]
+    + [f"{col}{row}" for row in range(REMITO_ITEM_FIRST_ROW, 45) for col in "ABDEFGH"]
+    + [f"{col}{row}" for row in (45, 46) for col in "EFG"]
+)
+
+# Formatos de salida del remito: extensión -> (nombre para mostrar, tipo MIME)
+REMITO_FORMATOS = {
+    "xlsx": ("Excel", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "pdf": ("PDF", "application/pdf"),
+}
+
+# Valor con el que se marcan las celdas al compilar (le resta el número de celda)
+_SLOT_SENTINEL = -987654321000
+
+# Generación por lote: remitos por tarea del pool de procesos y mínimo para usarlo
+REMITO_BATCH_CHUNK = 20
+REMITO_BATCH_MIN_PARALLEL = 100
+
+_MODIFIED_RE = re.compile(r'(<dcterms:modified[^>]*>)[^<]*(</dcterms:modified>)')
+
+def remito_values(remito_id, data, is_retiro=False):
     """
-    Genera un archivo Excel del remito usando la plantilla REMITO_Master.xls
-    y devuelve un buffer listo para descargar.
+    Valores del remito como {celda: valor}, en el orden en que se escriben en la plantilla
+    (una celda repetida queda con el último valor).
     """
-    # Obtener datos desde BD
-    data = get_remito_completo(remito_id)
-    if not data:
-        raise ValueError("Remito no encontrado")
-
     cab = data["cabecera"]
     items = data["items"]
-
-    # Cargar plantilla
-    template_path = os.path.join(os.path.dirname(__file__), "DOCS", "REMITO_Master.xlsx")
-    wb = load_workbook(template_path)
-    ws = wb.active
+    values = {}
 
     # --- Cabecera ---
-    ws["A3"] = st.secrets["DIRECCION_CLIENTE"]
-    ws["A5"] = cab["razon_social"]
-    ws["H5"] = cab["boca"] or ""
-    ws["H8"] = "Nro." + f'{remito_id:05d}'
-    ws["A6"] = f"{cab['direccion'] or ''} - {cab['localidad'] or ''}"
-    ws["G6"] = cab["telefono"] or ""
-    if not is_retiro:  # Solo cuando se genera el Remito (1ra. vez)
-        ws["H2"] = (1.0 - (float(cab["porc_dto"]) / 100.0)) if cab.get("porc_dto") else 1.0
-    else:
-        ws["H2"] = (1.0 - (float(cab["porc_dto"]) / 100.0)) if cab.get("porc_dto") else 1.0
+    values["A3"] = st.secrets["DIRECCION_CLIENTE"]
+    values["A5"] = cab["razon_social"]
+    values["H5"] = cab["boca"] or ""
+    values["H8"] = "Nro." + f'{remito_id:05d}'
+    values["A6"] = f"{cab['direccion'] or ''} - {cab['localidad'] or ''}"
+    values["G6"] = cab["telefono"] or ""
+    values["H2"] = (1.0 - (float(cab["porc_dto"]) / 100.0)) if cab.get("porc_dto") else 1.0
 
     # --- Items ---
-    base_row = 10
+    base_row = REMITO_ITEM_FIRST_ROW
     for i, row in items.iterrows():
-        ws[f"A{base_row+i}"] = row["nro_articulo"]
-        ws[f"B{base_row+i}"] = row["descripcion"]
+        values[f"A{base_row+i}"] = row["nro_articulo"]
+        values[f"B{base_row+i}"] = row["descripcion"]
         # Columna C utiliza la fórmula nativa de la plantilla Excel: =IF(D10 ="","",D10*$H$2)
-        ws[f"D{base_row+i}"] = float(row["precio_real"])
-        ws[f"E{base_row+i}"] = int(row["entregados"])
+        values[f"D{base_row+i}"] = float(row["precio_real"])
+        values[f"E{base_row+i}"] = int(row["entregados"])
         if is_retiro:
-            ws[f"F{base_row+i}"] = int(row["devueltos"])
-            ws[f"G{base_row+i}"] = int(row["entregados"]-row["devueltos"])
-            ws[f"H{base_row+i}"] = row["observaciones"]
+            values[f"F{base_row+i}"] = int(row["devueltos"])
+            values[f"G{base_row+i}"] = int(row["entregados"]-row["devueltos"])
+            values[f"H{base_row+i}"] = row["observaciones"]
 
     # --- Fecha de entrega ---
     fecha = pd.to_datetime(cab["fecha_entrega"])
-    ws["E45"] = fecha.day
-    ws["F45"] = fecha.month
-    ws["G45"] = fecha.year % 100
+    values["E45"] = fecha.day
+    values["F45"] = fecha.month
+    values["G45"] = fecha.year % 100
 
     # --- Fecha Retiro ---
     if is_retiro:
         try:
             fecha = pd.to_datetime(cab["fecha_retiro"]) #--
-            ws["E46"] = fecha.day
-            ws["F46"] = fecha.month
-            ws["G46"] = fecha.year % 100
+            values["E46"] = fecha.day
+            values["F46"] = fecha.month
+            values["G46"] = fecha.year % 100
         except:
             pass
 
+    return values
+
+class RemitoTemplate:
+    """
+    REMITO_Master.xlsx compilado: se abre una sola vez con openpyxl, se guarda con cada
+    celda de REMITO_SLOTS marcada y de ese paquete se conservan los archivos tal cual y la
+    hoja partida en los tramos fijos y las celdas a completar (con su estilo). render solo
+    escribe el XML de esas celdas, igual al que escribe openpyxl.
+    """
+
+    def __init__(self, path=REMITO_TEMPLATE_PATH):
+        self.mtime = os.path.getmtime(path)
+        wb = load_workbook(path)
+        ws = wb.active
+        self._ws = ws
+        # Las celdas combinadas (salvo la primera del rango) no admiten valor: quedan afuera
+        self.slots = [ref for ref in REMITO_SLOTS if not isinstance(ws[ref], MergedCell)]
+        defaults = {}
+        for k, ref in enumerate(self.slots):
+            defaults[ref] = ws[ref].value
+            ws[ref] = _SLOT_SENTINEL - k
+        buffer = io.BytesIO()
+        wb.save(buffer)
+
+        self.members = []
+        with zipfile.ZipFile(buffer) as zf:
+            for name in zf.namelist():
+                self.members.append((name, zf.read(name)))
+
+        sentinel = f"<v>{_SLOT_SENTINEL}</v>".encode()
+        self.sheet_index = next(i for i, (_, data) in enumerate(self.members) if sentinel in data)
+        sheet = self.members[self.sheet_index][1].decode('utf-8')
+        self.core_index = next((i for i, (name, _) in enumerate(self.members) if name == "docProps/core.xml"), None)
+
+        # Tramos fijos de la hoja, cada uno seguido de la celda que va después
+        cell_re = re.compile(r'<c r="([A-Z]+[0-9]+)"( s="[0-9]+")? t="n"><v>(-[0-9]+)</v></c>')
+        self.chunks = []
+        self.styles = {}
+        pos = 0
+        for match in cell_re.finditer(sheet):
+            k = _SLOT_SENTINEL - int(match.group(3))
+            if not 0 <= k < len(self.slots) or self.slots[k] != match.group(1):
+                continue
+            self.chunks.append((sheet[pos:match.start()], match.group(1)))
+            self.styles[match.group(1)] = match.group(2) or ''
+            pos = match.end()
+        self.tail = sheet[pos:]
+        if len(self.chunks) != len(self.slots):
+            raise ValueError("La plantilla del remito no tiene todas las celdas esperadas")
+        self.defaults = {ref: self.cell_xml(ref, value) for ref, value in defaults.items()}
+
+    def cell_xml(self, ref, value):
+        """XML de la celda con el valor dado, con la misma conversión de tipos que openpyxl."""
+        cell = Cell(self._ws, value=value)
+        data_type, value = cell.data_type, cell.value
+        if data_type not in ('n', 's', 'f', 'b', 'e'):
+            raise TypeError(f"Tipo de celda no compilado: {data_type}")
+
+        attrs = f'r="{ref}"{self.styles[ref]}'
+        if data_type != 'f':
+            attrs += f' t="{"inlineStr" if data_type == "s" else data_type}"'
+        if value is None or value == "":
+            return f'<c {attrs} />' if self.styles[ref] or value == "" else ''
+        if data_type == 'f':
+            return f'<c {attrs}><f>{escape(value[1:])}</f><v /></c>'
+        if data_type == 's':
+            space = ' xml:space="preserve"' if value.strip() and value != value.strip() else ''
+            return f'<c {attrs}><is><t{space}>{escape(value)}</t></is></c>'
+        text = safe_string(value)
+        return f'<c {attrs}><v>{escape(text)}</v></c>' if text else f'<c {attrs}><v /></c>'
+
+    def render(self, values):
+        """Paquete .xlsx con los valores dados ({celda: valor}, todas de self.slots)."""
+        cells = dict(self.defaults)
+        for ref, value in values.items():
+            cells[ref] = self.cell_xml(ref, value)
+        sheet = ''.join(chunk + cells[ref] for chunk, ref in self.chunks) + self.tail
+
+        output = io.BytesIO()
+        with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as zf:
+            for i, (name, data) in enumerate(self.members):
+                if i == self.sheet_index:
+                    data = sheet.encode('utf-8')
+                elif i == self.core_index:
+                    # openpyxl registra la hora de guardado como fecha de modificación
+                    modified = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+                    data = _MODIFIED_RE.sub(rf'\g<1>{modified}\g<2>', data.decode('utf-8')).encode('utf-8')
+                zf.writestr(name, data)
+        output.seek(0)
+        return output
+
+_remito_template = None
+_remito_template_lock = threading.Lock()
+
+def get_remito_template():
+    """Plantilla compilada del proceso (se vuelve a compilar si cambió REMITO_Master.xlsx)."""
+    global _remito_template
+    with _remito_template_lock:
+        if _remito_template is None or _remito_template.mtime != os.path.getmtime(REMITO_TEMPLATE_PATH):
+            _remito_template = RemitoTemplate()
+        return _remito_template
+
+def gen_remito_openpyxl(values) -> io.BytesIO:
+    """Escribe los valores en la plantilla con openpyxl (la forma lenta, para cualquier celda)."""
+    wb = load_workbook(REMITO_TEMPLATE_PATH)
+    ws = wb.active
+    for ref, value in values.items():
+        ws[ref] = value
+
     # Guardar en memoria
     output = io.BytesIO()
     wb.save(output)
     output.seek(0)
-
     return output
 
+def gen_remito(remito_id: int, is_retiro=False, snapshot=None, formato="xlsx") -> io.BytesIO:
+    """
+    Genera un archivo Excel (o PDF, con formato="pdf") del remito usando la plantilla
+    REMITO_Master.xlsx y devuelve un buffer listo para descargar.
+    snapshot: datos ya leídos con get_remito_snapshot (evita volver a consultar la BD).
+    """
+    # Obtener datos desde BD (o reutilizar los ya leídos)
+    data = snapshot if snapshot is not None else get_remito_snapshot(remito_id)
+    if not data:
+        raise ValueError("Remito no encontrado")
+
+    return render_remito(remito_values(remito_id, data, is_retiro), formato)
+
+def render_remito(values, formato="xlsx") -> io.BytesIO:
+    """Excel (o PDF) del remito con los valores de remito_values."""
+    if formato == "pdf":
+        from gen_remito_pdf import render_remito_pdf
+        return render_remito_pdf(values, title=f"Remito {values.get('H8', '')}")
+
+    # Más items que filas de la plantilla, o un tipo de valor que la plantilla compilada
+    # no escribe: se usa openpyxl, que produce el mismo archivo
+    template = get_remito_template()
+    if not set(values) <= set(template.slots):
+        return gen_remito_openpyxl(values)
+    try:
+        return template.render(values)
+    except TypeError:
+        return gen_remito_openpyxl(values)
+
+def _render_remitos(jobs, formato="xlsx"):
+    """Tarea del pool de procesos: [(nombre, valores)] -> [(nombre, contenido del archivo)]."""
+    return [(name, render_remito(values, formato).getvalue()) for name, values in jobs]
+
+def _remitos_jobs(snapshots, is_retiro, formato):
+    """[(nombre de archivo, valores)] de cada remito y [(remito_id, error)] de los que fallan."""
+    jobs = []
+    errores = []
+    for remito_id, snapshot in snapshots.items():
+        try:
+            jobs.append((get_remito_filename(remito_id, is_retiro=is_retiro, snapshot=snapshot, formato=formato),
+                         remito_values(remito_id, snapshot, is_retiro)))
+        except Exception as e:
+            errores.append((remito_id, str(e)))
+    return jobs, errores
+
+def gen_remitos_zip(output, snapshots, is_retiro=False, workers=None, on_progress=None, formato="xlsx"):
+    """
+    Escribe en output (archivo binario) un ZIP con el Excel (o el PDF) de cada remito de
+    snapshots ({remito_id: snapshot}, como lo devuelve models.get_remitos_completos), con
+    los nombres de get_remito_filename.
+
+    Los valores se arman en este proceso (remito_values usa st.secrets) y el render se
+    reparte por tandas de REMITO_BATCH_CHUNK en un pool de procesos, que compila la
+    plantilla una vez por proceso; cada tanda se agrega al ZIP apenas termina. Con menos de
+    REMITO_BATCH_MIN_PARALLEL remitos se renderiza acá (arrancar el pool cuesta más).
+    on_progress(hechos, total) se llama después de cada tanda.
+    Retorna (cantidad generada, [(remito_id, error)] de los que no se pudieron armar).
+    """
+    jobs, errores = _remitos_jobs(snapshots, is_retiro, formato)
+    chunks = [jobs[i:i + REMITO_BATCH_CHUNK] for i in range(0, len(jobs), REMITO_BATCH_CHUNK)]
+
+    pool = None
+    if len(jobs) >= REMITO_BATCH_MIN_PARALLEL:
+        pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        render = pool.map if pool else map
+        results = render(_render_remitos, chunks, repeat(formato))
+        hechos = 0
+        # Los .xlsx y los PDF ya vienen comprimidos: se guardan sin volver a comprimir
+        with zipfile.ZipFile(output, 'w', zipfile.ZIP_STORED) as zf:
+            for rendered in results:
+                for name, data in rendered:
+                    zf.writestr(name, data)
+                hechos += len(rendered)
+                if on_progress:
+                    on_progress(hechos, len(jobs))
+    finally:
+        if pool:
+            pool.shutdown()
+
+    return len(jobs), errores
+
+def gen_remitos_pdf(output, snapshots, is_retiro=False, on_progress=None):
+    """
+    Escribe en output (archivo binario) un único PDF con un remito de snapshots por página,
+    para imprimirlos de una vez. El fondo de la plantilla se define una sola vez en el PDF.
+    on_progress(hechos, total) se llama cada REMITO_BATCH_CHUNK remitos.
+    Retorna (cantidad generada, [(remito_id, error)] de los que no se pudieron armar).
+    """
+    from gen_remito_pdf import render_remitos_pdf
+    jobs, errores = _remitos_jobs(snapshots, is_retiro, "pdf")
+
+    def pages():
+        for hechos, (_, values) in enumerate(jobs, start=1):
+            yield values
+            if on_progress and (hechos % REMITO_BATCH_CHUNK == 0 or hechos == len(jobs)):
+                on_progress(hechos, len(jobs))
+
+    if jobs:
+        output.write(render_remitos_pdf(pages(), title="Remitos").getvalue())
+    return len(jobs), errores
+
 def get_desktop_path() -> str:
     """Obtiene la ruta real del Escritorio de Windows, soportando redirecciones (como OneDrive)."""
     try:
@@ -142,16 +373,16 @@ def select_folder_native(default_dir=None) -> str:
     except Exception:
         return None
 
-def get_remito_filename(remito_id: int, is_retiro: bool = False) -> str:
+def get_remito_filename(remito_id: int, is_retiro: bool = False, snapshot=None, formato="xlsx") -> str:
     """
-    Construye el nombre del archivo Excel en formato:
+    Construye el nombre del archivo Excel (o PDF, con la extensión de formato) en formato:
     Remito_<boca:04d>_<remito_id>.xlsx
     o bien
     Remito_<boca:04d>_<remito_id>_Ventas.xlsx (si es retiro)
     """
     boca_str = "0000"
     try:
-        data = get_remito_completo(remito_id)
+        data = snapshot if snapshot is not None else get_remito_snapshot(remito_id)
         if data and "cabecera" in data:
             boca_val = data["cabecera"].get("boca")
             if boca_val is not None and str(boca_val).strip() != "":
@@ -160,32 +391,35 @@ def get_remito_filename(remito_id: int, is_retiro: bool = False) -> str:
         pass
 
     if is_retiro:
-        return f"Remito_{boca_str}_{remito_id}_Ventas.xlsx"
+        return f"Remito_{boca_str}_{remito_id}_Ventas.{formato}"
     else:
-        return f"Remito_{boca_str}_{remito_id}.xlsx"
+        return f"Remito_{boca_str}_{remito_id}.{formato}"
 
-def save_remito_to_custom_folder(remito_id: int, folder_path: str, is_retiro: bool = False) -> str:
-    """Guarda el remito Excel en la carpeta indicada por el usuario."""
+def save_remito_to_custom_folder(remito_id: int, folder_path: str, is_retiro: bool = False, snapshot=None, formato="xlsx") -> str:
+    """Guarda el remito Excel (o PDF) en la carpeta indicada por el usuario."""
     os.makedirs(folder_path, exist_ok=True)
-    file_name = get_remito_filename(remito_id, is_retiro=is_retiro)
+    # Una sola lectura del remito para el nombre de archivo y el contenido
+    if snapshot is None:
+        snapshot = get_remito_snapshot(remito_id)
+    file_name = get_remito_filename(remito_id, is_retiro=is_retiro, snapshot=snapshot, formato=formato)
     target_path = os.path.join(folder_path, file_name)
-    excel_buffer = gen_remito(remito_id, is_retiro=is_retiro)
+    excel_buffer = gen_remito(remito_id, is_retiro=is_retiro, snapshot=snapshot, formato=formato)
     with open(target_path, "wb") as f:
         f.write(excel_buffer.getvalue())
 
     return target_path
 
-def save_remito_to_desktop(remito_id: int, is_retiro: bool = False) -> str:
+def save_remito_to_desktop(remito_id: int, is_retiro: bool = False, snapshot=None, formato="xlsx") -> str:
     """
-    Genera el remito Excel y lo guarda directamente en Escritorio/REMITOS CONSIGNACION.
+    Genera el remito Excel (o PDF) y lo guarda directamente en Escritorio/REMITOS CONSIGNACION.
     Crea la carpeta si no existe.
     Devuelve la ruta absoluta del archivo guardado.
     """
     desktop_path = get_desktop_path()
     target_dir = os.path.join(desktop_path, "REMITOS CONSIGNACION")
-    return save_remito_to_custom_folder(remito_id, target_dir, is_retiro=is_retiro)
+    return save_remito_to_custom_folder(remito_id, target_dir, is_retiro=is_retiro, snapshot=snapshot, formato=formato)
 
-def process_generate_remito(remito_id: int, is_retiro: bool = False, default_dir: str = None):
+def process_generate_remito(remito_id: int, is_retiro: bool = False, default_dir: str = None, snapshot=None, formato="xlsx"):
     """
     Función híbrida para procesar la generación del remito.
     Si se ejecuta localmente, abre el diálogo para elegir carpeta y guarda el archivo.
@@ -194,12 +428,12 @@ def process_generate_remito(remito_id: int, is_retiro: bool = False, default_dir
     if is_local_app():
         selected_folder = select_folder_native(default_dir=default_dir)
         if selected_folder:
-            saved_path = save_remito_to_custom_folder(remito_id, selected_folder, is_retiro=is_retiro)
+            saved_path = save_remito_to_custom_folder(remito_id, selected_folder, is_retiro=is_retiro, snapshot=snapshot, formato=formato)
             display_path = config.format_display_path(saved_path)
             return True, display_path, selected_folder
         else:
             return False, "Operación cancelada por el usuario.", None
     else:
-        target_path = save_remito_to_desktop(remito_id, is_retiro=is_retiro)
+        target_path = save_remito_to_desktop(remito_id, is_retiro=is_retiro, snapshot=snapshot, formato=formato)
         display_path = config.format_display_path(target_path)
         return True, display_path, None
@@ -0,0 +1,387 @@
+# -*- coding: utf-8 -*-
+"""
+Remito en PDF generado con reportlab, con el diseño de la plantilla REMITO_Master.xlsx.
+
+La plantilla se compila una vez por proceso: anchos de columna, altos de fila, celdas
+combinadas, bordes, textos fijos y estilos se leen con openpyxl y el fondo de la página
+queda armado como una lista de trazos y textos. Cada PDF lo define una sola vez como form
+XObject y en cada página solo se escriben los valores de remito_values y las fórmulas de
+la plantilla (calculadas acá, porque el PDF no las evalúa).
+"""
+import os
+import io
+import re
+import numbers
+import threading
+from decimal import Decimal, ROUND_HALF_UP
+from functools import lru_cache
+from openpyxl import load_workbook
+from openpyxl.cell import MergedCell
+from openpyxl.utils import get_column_letter, range_boundaries
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+from gen_remito import REMITO_TEMPLATE_PATH, REMITO_SLOTS
+
+# Fuentes de la plantilla: (nombre, negrita) -> (archivo TrueType de Windows, fuente
+# estándar de PDF). Si el archivo está instalado se incrusta; si no, se usa la estándar
+REMITO_PDF_FONTS = {
+    ("Arial", False): ("arial.ttf", "Helvetica"),
+    ("Arial", True): ("arialbd.ttf", "Helvetica-Bold"),
+    ("Edwardian Script ITC", False): ("ITCEDSCR.TTF", "Times-Italic"),
+    ("Edwardian Script ITC", True): ("ITCEDSCR.TTF", "Times-BoldItalic"),
+    ("Copperplate Gothic Bold", False): ("COPRGTB.TTF", "Times-Bold"),
+    ("Copperplate Gothic Bold", True): ("COPRGTB.TTF", "Times-Bold"),
+}
+REMITO_PDF_FONTS_DIR = os.path.join(os.environ.get("WINDIR", r"C:\Windows"), "Fonts")
+
+# Conversión de medidas de Excel: ancho de un dígito de Arial 10 en píxeles y puntos por píxel
+_EXCEL_DIGIT_PX = 7
+_POINTS_PER_PX = 0.75
+# Margen interno del texto dentro de la celda (puntos)
+_CELL_PADDING = 2
+# Grosor de línea de cada estilo de borde (los punteados se dibujan como línea continua)
+_BORDER_WIDTHS = {"hair": 0.25, "thin": 0.5, "medium": 1.0, "thick": 1.5, "double": 1.5}
+
+_FORM_NAME = "remito_fondo"
+_ACCOUNTING_RE = re.compile(r'"\$"\*')
+_FIXED_RE = re.compile(r'^(#,##)?0(?:\.(0+))?$')
+# Fórmulas que usa la plantilla: precio minorista de cada item y totales de columnas
+_IF_BLANK_RE = re.compile(r'^=IF\(([A-Z]+[0-9]+) *="","",\1\*\$?([A-Z]+)\$?([0-9]+)\)$')
+_SUM_RE = re.compile(r'^=SUM\(([A-Z]+)([0-9]+):\1([0-9]+)\)$')
+
+@lru_cache(maxsize=None)
+def pdf_font(name, bold=False):
+    """Nombre de la fuente registrada en reportlab para la fuente de Excel (una vez por proceso)."""
+    file_name, fallback = REMITO_PDF_FONTS.get((name, bold), (None, "Helvetica-Bold" if bold else "Helvetica"))
+    if file_name:
+        path = os.path.join(REMITO_PDF_FONTS_DIR, file_name)
+        if os.path.exists(path):
+            font_name = f"Remito-{os.path.splitext(file_name)[0]}"
+            try:
+                pdfmetrics.registerFont(TTFont(font_name, path))
+                return font_name
+            except Exception:
+                pass
+    return fallback
+
+def _numero(valor, decimales=0, miles=True):
+    """Número con separadores argentinos: 1.234,50. Redondea como Excel (0,5 hacia arriba)."""
+    valor = Decimal(str(valor)).quantize(Decimal(1).scaleb(-decimales), rounding=ROUND_HALF_UP)
+    texto = f"{valor:,.{decimales}f}" if miles else f"{valor:.{decimales}f}"
+    return texto.replace(",", "X").replace(".", ",").replace("X", ".")
+
+def format_cell_value(value, number_format):
+    """
+    Texto que muestra Excel para el valor con el formato de la celda, como (texto, alineación
+    de General). En formato contable el texto es una tupla (símbolo, número).
+    """
+    if isinstance(value, bool):
+        return ("VERDADERO" if value else "FALSO"), "center"
+    if not isinstance(value, numbers.Number):
+        return str(value), "left"
+
+    value = float(value)
+    if _ACCOUNTING_RE.search(number_format):
+        if value == 0:
+            return ("$", "-  "), "right"
+        texto = _numero(abs(value))
+        return ("$", f"({texto})" if value < 0 else f"{texto} "), "right"
+    match = _FIXED_RE.match(number_format)
+    if match:
+        return _numero(value, len(match.group(2) or ""), bool(match.group(1))), "right"
+    # General: enteros sin decimales y el resto con hasta 10 cifras significativas
+    if value.is_integer() and abs(value) < 1e15:
+        return str(int(value)), "right"
+    return f"{value:.10g}".replace(".", ","), "right"
+
+class _CellStyle:
+    """Lo que hace falta del estilo de una celda para escribir su texto."""
+
+    __slots__ = ("font", "size", "horizontal", "vertical", "wrap", "number_format")
+
+    def __init__(self, cell):
+        self.font = pdf_font(cell.font.name or "Arial", bool(cell.font.b))
+        self.size = float(cell.font.sz or 10)
+        self.horizontal = cell.alignment.horizontal
+        self.vertical = cell.alignment.vertical or "bottom"
+        self.wrap = bool(cell.alignment.wrap_text)
+        self.number_format = cell.number_format or "General"
+
+class RemitoPdfTemplate:
+    """
+    REMITO_Master.xlsx compilado para reportlab: geometría del área de impresión en
+    puntos, fondo (bordes y textos fijos), estilo de cada celda, valores por defecto de las
+    celdas de REMITO_SLOTS y fórmulas a calcular en cada remito.
+    """
+
+    def __init__(self, path=REMITO_TEMPLATE_PATH):
+        self.mtime = os.path.getmtime(path)
+        wb = load_workbook(path)
+        ws = wb.active
+
+        if ws.print_area:
+            area = ws.print_area.split(",")[0].split("!")[-1].replace("$", "")
+            min_col, min_row, max_col, max_row = range_boundaries(area)
+        else:
+            min_col, min_row, max_col, max_row = 1, 1, ws.max_column, ws.max_row
+
+        # Bordes de columnas (x, de izquierda a derecha) y filas (desde arriba), en puntos
+        default_width = ws.sheet_format.defaultColWidth or 8.43
+        default_height = ws.sheet_format.defaultRowHeight or 15
+        xs = [0.0]
+        for col in range(min_col, max_col + 1):
+            width = ws.column_dimensions[get_column_letter(col)].width or default_width
+            xs.append(xs[-1] + int(width * _EXCEL_DIGIT_PX + 0.5) * _POINTS_PER_PX)
+        tops = [0.0]
+        for row in range(min_row, max_row + 1):
+            tops.append(tops[-1] + (ws.row_dimensions[row].ht or default_height))
+        self.width, self.height = xs[-1], tops[-1]
+        # En reportlab y crece hacia arriba: 0 es el pie del área de impresión
+        ys = [self.height - top for top in tops]
+
+        def bounds(col1, row1, col2, row2):
+            return (xs[col1 - min_col], ys[row2 - min_row + 1], xs[col2 - min_col + 1], ys[row1 - min_row])
+
+        merged = {}
+        merged_cells = {}
+        for rng in ws.merged_cells.ranges:
+            if min_col <= rng.min_col and rng.max_col <= max_col and min_row <= rng.min_row and rng.max_row <= max_row:
+                merged[rng.start_cell.coordinate] = bounds(rng.min_col, rng.min_row, rng.max_col, rng.max_row)
+                for row, col in rng.cells:
+                    merged_cells[(row, col)] = rng
+
+        # Hoja A4 con los márgenes de la plantilla, achicada si el área no entra
+        margins = ws.page_margins
+        page_width, page_height = A4
+        usable_width = page_width - (margins.left + margins.right) * 72
+        usable_height = page_height - (margins.top + margins.bottom) * 72
+        self.scale = min(1.0, usable_width / self.width, usable_height / self.height)
+        self.origin_x = margins.left * 72
+        if ws.print_options.horizontalCentered:
+            self.origin_x += (usable_width - self.width * self.scale) / 2
+        self.origin_y = page_height - margins.top * 72 - self.height * self.scale
+
+        slots = set(REMITO_SLOTS)
+        segments = {}
+        self.boxes = {}
+        self.styles = {}
+        self.defaults = {}
+        self.formulas = []
+        self.background = []
+        for row in ws.iter_rows(min_row=min_row, max_row=max_row, min_col=min_col, max_col=max_col):
+            for cell in row:
+                x0, y0, x1, y1 = bounds(cell.column, cell.row, cell.column, cell.row)
+                # Dentro de un rango combinado solo se dibujan los bordes del contorno
+                rng = merged_cells.get((cell.row, cell.column))
+                for side, line, inner in (
+                    ("left", (x0, y0, x0, y1), rng and cell.column > rng.min_col),
+                    ("right", (x1, y0, x1, y1), rng and cell.column < rng.max_col),
+                    ("top", (x0, y1, x1, y1), rng and cell.row > rng.min_row),
+                    ("bottom", (x0, y0, x1, y0), rng and cell.row < rng.max_row),
+                ):
+                    style = getattr(cell.border, side).style
+                    if style and not inner:
+                        segments.setdefault(_BORDER_WIDTHS.get(style, 0.5), set()).add(tuple(round(v, 2) for v in line))
+
+                # Las celdas combinadas (salvo la primera del rango) no tienen valor
+                if isinstance(cell, MergedCell):
+                    continue
+                ref = cell.coordinate
+                self.boxes[ref] = merged.get(ref, (x0, y0, x1, y1))
+                self.styles[ref] = _CellStyle(cell)
+                if isinstance(cell.value, str) and cell.value.startswith("="):
+                    self.formulas.append((ref, _compile_formula(ref, cell.value)))
+                elif ref in slots:
+                    self.defaults[ref] = cell.value
+                elif cell.value is not None:
+                    # Los textos fijos desbordan sobre las celdas vecinas, como en Excel
+                    self.background.extend(self.text_ops(ref, cell.value, clip=False))
+        self.segments = {width: _merge_segments(lines) for width, lines in segments.items()}
+
+    def text_ops(self, ref, value, clip=True):
+        """
+        Operaciones para escribir el valor en la celda con su estilo: ("text", fuente, tamaño,
+        x, y, texto, alineación), entre ("clip", caja) y ("restore",) si no entra en la celda.
+        """
+        style = self.styles[ref]
+        x0, y0, x1, y1 = self.boxes[ref]
+        text, general_align = format_cell_value(value, style.number_format)
+        font, size = style.font, style.size
+        if isinstance(text, tuple):
+            # Contable: el símbolo contra el borde izquierdo y el número contra el derecho
+            lines, align = [text[1]], "right"
+            ops = [("text", font, size, x0 + _CELL_PADDING, 0, text[0], "left")]
+        else:
+            align = style.horizontal if style.horizontal in ("left", "center", "right") else general_align
+            lines = _wrap(text, font, size, x1 - x0 - 2 * _CELL_PADDING) if style.wrap else [text]
+            ops = []
+
+        leading = size * 1.15
+        block = leading * (len(lines) - 1)
+        if style.vertical == "top":
+            first = y1 - _CELL_PADDING - size * 0.8
+        elif style.vertical == "center":
+            first = (y0 + y1) / 2 + block / 2 - size * 0.35
+        else:
+            first = y0 + _CELL_PADDING + size * 0.2 + block
+        x = {"left": x0 + _CELL_PADDING, "right": x1 - _CELL_PADDING}.get(align, (x0 + x1) / 2)
+        ops = [op[:4] + (first,) + op[5:] for op in ops]
+        ops.extend(("text", font, size, x, first - i * leading, line, align) for i, line in enumerate(lines))
+
+        if clip and sum(pdfmetrics.stringWidth(op[5], font, size) for op in ops) > x1 - x0 - 2 * _CELL_PADDING:
+            return [("clip", (x0, y0, x1, y1))] + ops + [("restore",)]
+        return ops
+
+    def draw_background(self, c):
+        """Define el fondo (bordes y textos fijos) como form XObject del PDF."""
+        c.beginForm(_FORM_NAME, lowerx=-self.width, lowery=-self.height, upperx=2 * self.width, uppery=2 * self.height)
+        c.setLineCap(2)
+        for width, lines in self.segments.items():
+            c.setLineWidth(width)
+            path = c.beginPath()
+            for ax, ay, bx, by in lines:
+                path.moveTo(ax, ay)
+                path.lineTo(bx, by)
+            c.drawPath(path, stroke=1, fill=0)
+        _draw_ops(c, self.background)
+        c.endForm()
+
+    def draw_page(self, c, values):
+        """Una página del remito con los valores dados ({celda: valor}) sobre el fondo ya definido."""
+        cells = dict(self.defaults)
+        cells.update(values)
+        ops = []
+        for ref, value in cells.items():
+            if value is None or value == "":
+                continue
+            if ref not in self.styles:
+                raise ValueError(f"La celda {ref} no se puede escribir en la plantilla del remito")
+            ops.extend(self.text_ops(ref, value))
+        for ref, formula in self.formulas:
+            # Un valor escrito en la celda reemplaza a la fórmula, como en el Excel
+            if ref in values:
+                continue
+            cells[ref] = value = formula(cells.get)
+            if value is not None:
+                ops.extend(self.text_ops(ref, value))
+
+        c.saveState()
+        c.translate(self.origin_x, self.origin_y)
+        c.scale(self.scale, self.scale)
+        c.doForm(_FORM_NAME)
+        _draw_ops(c, ops)
+        c.restoreState()
+        c.showPage()
+
+    def render(self, pages, title=None):
+        """PDF con una página por cada {celda: valor} de pages; el fondo se define una sola vez."""
+        output = io.BytesIO()
+        c = canvas.Canvas(output, pagesize=A4)
+        if title:
+            c.setTitle(title)
+        self.draw_background(c)
+        for values in pages:
+            self.draw_page(c, values)
+        c.save()
+        output.seek(0)
+        return output
+
+def _compile_formula(ref, formula):
+    """Fórmula de la plantilla como función de get(celda) -> valor."""
+    match = _IF_BLANK_RE.match(formula)
+    if match:
+        source, factor = match.group(1), match.group(2) + match.group(3)
+
+        def if_blank(get):
+            value = get(source)
+            if value is None or value == "":
+                return None
+            return float(value) * float(get(factor) or 0)
+        return if_blank
+
+    match = _SUM_RE.match(formula)
+    if match:
+        refs = [f"{match.group(1)}{row}" for row in range(int(match.group(2)), int(match.group(3)) + 1)]
+
+        def col_sum(get):
+            return sum(float(v) for v in map(get, refs) if isinstance(v, numbers.Number) and not isinstance(v, bool))
+        return col_sum
+
+    raise ValueError(f"La plantilla del remito tiene una fórmula que el PDF no calcula: {ref} {formula}")
+
+def _wrap(text, font, size, width):
+    """Líneas del texto con ajuste de línea: corta entre palabras y, si una no entra, entre letras."""
+    lines = []
+    for line in simpleSplit(text, font, size, width) or [text]:
+        while len(line) > 1 and pdfmetrics.stringWidth(line, font, size) > width:
+            cut = len(line) - 1
+            while cut > 1 and pdfmetrics.stringWidth(line[:cut], font, size) > width:
+                cut -= 1
+            lines.append(line[:cut])
+            line = line[cut:]
+        lines.append(line)
+    return lines
+
+def _merge_segments(lines):
+    """Une los bordes de celdas contiguas en líneas largas (el fondo queda con muchos menos trazos)."""
+    merged = []
+    # Horizontales (misma y) y verticales (misma x), ordenados a lo largo de la línea
+    for horizontal in (True, False):
+        key = (lambda l: (l[1], l[0])) if horizontal else (lambda l: (l[0], l[1]))
+        group = sorted((l for l in lines if (l[1] == l[3]) == horizontal and (l[0] == l[2]) != horizontal), key=key)
+        for line in group:
+            ax, ay, bx, by = line
+            if merged and horizontal and merged[-1][1] == ay and merged[-1][3] == by and merged[-1][2] >= ax:
+                merged[-1] = (merged[-1][0], ay, max(merged[-1][2], bx), by)
+            elif merged and not horizontal and merged[-1][0] == ax and merged[-1][2] == bx and merged[-1][3] >= ay:
+                merged[-1] = (ax, merged[-1][1], bx, max(merged[-1][3], by))
+            else:
+                merged.append(line)
+    return merged
+
+def _draw_ops(c, ops):
+    """Ejecuta las operaciones de texto de RemitoPdfTemplate.text_ops."""
+    font = None
+    for op in ops:
+        if op[0] == "text":
+            _, name, size, x, y, text, align = op
+            if font != (name, size):
+                c.setFont(name, size)
+                font = (name, size)
+            if align == "left":
+                c.drawString(x, y, text)
+            elif align == "right":
+                c.drawRightString(x, y, text)
+            else:
+                c.drawCentredString(x, y, text)
+        elif op[0] == "clip":
+            x0, y0, x1, y1 = op[1]
+            c.saveState()
+            path = c.beginPath()
+            path.rect(x0, y0, x1 - x0, y1 - y0)
+            c.clipPath(path, stroke=0, fill=0)
+        else:
+            c.restoreState()
+            font = None
+
+_remito_pdf_template = None
+_remito_pdf_template_lock = threading.Lock()
+
+def get_remito_pdf_template():
+    """Plantilla PDF compilada del proceso (se vuelve a compilar si cambió REMITO_Master.xlsx)."""
+    global _remito_pdf_template
+    with _remito_pdf_template_lock:
+        if _remito_pdf_template is None or _remito_pdf_template.mtime != os.path.getmtime(REMITO_TEMPLATE_PATH):
+            _remito_pdf_template = RemitoPdfTemplate()
+        return _remito_pdf_template
+
+def render_remito_pdf(values, title=None) -> io.BytesIO:
+    """PDF del remito con los valores de remito_values."""
+    return get_remito_pdf_template().render([values], title=title)
+
+def render_remitos_pdf(pages, title=None) -> io.BytesIO:
+    """Un único PDF con un remito por página (valores de remito_values), listo para imprimir."""
+    return get_remito_pdf_template().render(pages, title=title)
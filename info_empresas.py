@@ -1,10 +1,7 @@
 # -*- coding: utf-8 -*-
-import datetime
-import calendar
 import pandas as pd
 import streamlit as st
-from sqlalchemy import text
-from models import engine
+from informes import obtener_agrupado, selector_periodo, mostrar_comparacion_anio_anterior
 import io
 import openpyxl
 from openpyxl.utils import get_column_letter
@@ -12,11 +9,6 @@ from openpyxl.styles import Font, PatternFill, Border, Side
 import numpy as np
 import config
 
-MESES = [
-    "Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio",
-    "Julio", "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre"
-]
-
 def generar_excel_empresas(agrupado, total_remitos_mes, total_articulos_mes, total_venta_mes, total_utilidad_mes):
     output = io.BytesIO()
     df_excel = pd.DataFrame({
@@ -55,7 +47,7 @@ def generar_excel_empresas(agrupado, total_remitos_mes, total_articulos_mes, tot
         # Fila final de Totales en Negrita
         total_margen_mes = (total_utilidad_mes / total_venta_mes * 100.0) if total_venta_mes > 0 else 0.0
         tot_row = len(df_excel) + 3
-        c1 = ws.cell(row=tot_row, column=1, value="Total del Mes")
+        c1 = ws.cell(row=tot_row, column=1, value="Total del Período")
         c4 = ws.cell(row=tot_row, column=4, value=total_remitos_mes)
         c4.number_format = '#,##0'
         c5 = ws.cell(row=tot_row, column=5, value=total_articulos_mes)
@@ -83,106 +75,23 @@ def info_empresas_ranking():
     st.markdown('<div style="font-size: 0.85rem; color: #00E676; font-weight: 500; margin-top: -0.4rem; margin-bottom: 0.8rem;">El Análisis Gráfico se encuentra al final de la página</div>', unsafe_allow_html=True)
     st.markdown("---")
 
-    # Fecha actual para predeterminar la selección
-    today = datetime.date.today()
-    current_year = today.year
-    current_month = today.month
+    # Controles de selección del período (mes, trimestre, año o rango personalizado)
+    periodo = selector_periodo("info_empresas")
+    fecha_inicio, fecha_fin = periodo.inicio, periodo.fin
+    comparar_anterior = st.checkbox("Comparar con el mismo período del año anterior", key="info_empresas_yoy")
 
-    # Controles de selección de Mes y Año
-    col_mes, col_anio, _ = st.columns([2, 2, 4], gap="small")
-    
-    with col_mes:
-        mes_nombre = st.selectbox(
-            "Mes",
-            options=MESES,
-            index=current_month - 1,
-            key="info_empresas_mes"
-        )
-        mes_num = MESES.index(mes_nombre) + 1
-
-    with col_anio:
-        min_year = min(2026, current_year)
-        max_year = max(2050, current_year)
-        anios_disponibles = list(range(min_year, max_year + 1))
-        index_anio = anios_disponibles.index(current_year)
-        anio_num = st.selectbox(
-            "Año",
-            options=anios_disponibles,
-            index=index_anio,
-            key="info_empresas_anio"
-        )
-
-    # Rango de fechas del mes completo seleccionado
-    _, ult_dia = calendar.monthrange(anio_num, mes_num)
-    fecha_inicio = datetime.date(anio_num, mes_num, 1)
-    fecha_fin = datetime.date(anio_num, mes_num, ult_dia)
-
-    # Consulta a base de datos de remitos con fecha_retiro en el mes seleccionado
+    # Informe agrupado del período seleccionado (una fila por grupo, calculada en la base de datos)
     try:
-        with engine.begin() as conn:
-            query = text("""
-                SELECT 
-                    r.id AS remito_id,
-                    r.fecha_retiro,
-                    c.id AS cliente_id,
-                    c.razon_social,
-                    COALESCE(c.boca, 0) AS boca,
-                    COALESCE(r.porc_dto, c.porc_dto, 0) AS porc_dto,
-                    ri.entregados,
-                    COALESCE(ri.devueltos, 0) AS devueltos,
-                    COALESCE(ri.precio_real_item, a.precio_real, 0) AS precio_real,
-                    COALESCE(a.costo, 0) AS costo
-                FROM remitos r
-                JOIN clientes c ON r.cliente_id = c.id
-                JOIN remito_items ri ON r.id = ri.remito_id
-                JOIN articulos a ON ri.articulo_id = a.id
-                WHERE r.fecha_retiro IS NOT NULL 
-                  AND r.fecha_retiro >= :start_date 
-                  AND r.fecha_retiro <= :end_date
-            """)
-            df_raw = pd.read_sql(query, conn, params={"start_date": fecha_inicio, "end_date": fecha_fin})
+        agrupado = obtener_agrupado("cliente", fecha_inicio, fecha_fin)
     except Exception as e:
         st.error(f"Error al consultar la base de datos: {e}")
         return
 
-    if df_raw.empty:
-        st.info(f"ℹ️ No existen Remitos con ventas registradas en {mes_nombre} {anio_num}.")
-        st.metric("Total Utilidad del Mes", "$ 0.00")
+    if agrupado.empty:
+        st.info(f"ℹ️ No existen Remitos con ventas registradas en {periodo.etiqueta}.")
+        st.metric("Total Utilidad del Período", "$ 0.00")
         return
 
-    # Aplicar cálculo de vendidos y utilidad ítem por ítem
-    def calcular_item(row):
-        entregados = int(row["entregados"]) if pd.notna(row["entregados"]) else 0
-        devueltos = int(row["devueltos"]) if pd.notna(row["devueltos"]) else 0
-        vendidos = max(0, entregados - devueltos)
-
-        p_real = float(row["precio_real"]) if pd.notna(row["precio_real"]) else 0.0
-        porc_dto = float(row["porc_dto"]) if pd.notna(row["porc_dto"]) else 0.0
-        costo = float(row["costo"]) if pd.notna(row["costo"]) else 0.0
-
-        if p_real > 0 and vendidos > 0:
-            p_dto = p_real * (1.0 - (porc_dto / 100.0))
-            venta_total = p_dto * vendidos
-            utilidad = (p_dto - costo) * vendidos
-        else:
-            venta_total = 0.0
-            utilidad = 0.0
-
-        return pd.Series({"vendidos": vendidos, "venta_total": venta_total, "utilidad": utilidad})
-
-    res_items = df_raw.apply(calcular_item, axis=1)
-    df_raw["vendidos"] = res_items["vendidos"]
-    df_raw["venta_total"] = res_items["venta_total"]
-    df_raw["utilidad"] = res_items["utilidad"]
-
-    # Agrupar por Cliente (razon_social, boca)
-    agrupado = df_raw.groupby(["cliente_id", "razon_social", "boca"]).agg(
-        cant_articulos=("vendidos", "sum"),
-        venta_cliente=("venta_total", "sum"),
-        utilidad_cliente=("utilidad", "sum"),
-        cant_remitos=("remito_id", "nunique")
-    ).reset_index()
-
     agrupado["utilidad_prom_remito"] = (agrupado["utilidad_cliente"] / agrupado["cant_remitos"]).round(2)
 
     # Ordenar por Utilidad Descendente (Ranking)
@@ -236,7 +145,7 @@ def info_empresas_ranking():
     with m_col0:
         st.markdown("<div style='margin-top: 15px;'></div>", unsafe_allow_html=True)
         excel_bytes = generar_excel_empresas(agrupado, total_remitos_mes, total_articulos_mes, total_venta_mes, total_utilidad_mes)
-        filename_excel = f"info_empresas_{anio_num:04d}{mes_num:02d}.xlsx"
+        filename_excel = f"info_empresas_{periodo.sufijo}.xlsx"
         st.download_button(
             label="📊 Exportar a Excel",
             data=excel_bytes,
@@ -264,7 +173,7 @@ def info_empresas_ranking():
     with m_col3:
         st.markdown(f"""
         <div style="text-align: right; width: 100%;">
-            <div style="font-size: 0.85rem; color: rgba(250, 250, 250, 0.7); font-weight: 400; margin-bottom: 4px;">Total Utilidad del Mes</div>
+            <div style="font-size: 0.85rem; color: rgba(250, 250, 250, 0.7); font-weight: 400; margin-bottom: 4px;">Total Utilidad del Período</div>
             <div style="font-size: 1.8rem; font-weight: 600; color: var(--text-color, #ffffff); line-height: 1.2;">$ {total_utilidad_mes:,.2f}</div>
         </div>
         """, unsafe_allow_html=True)
@@ -277,9 +186,13 @@ def info_empresas_ranking():
     </div>
     """, unsafe_allow_html=True)
 
+    if comparar_anterior:
+        st.markdown("---")
+        mostrar_comparacion_anio_anterior("cliente", periodo)
+
     # === SECCIÓN DE GRÁFICOS VISUALES ===
     st.markdown("---")
-    st.subheader("📊 Análisis Gráfico del Mes")
+    st.subheader("📊 Análisis Gráfico del Período")
 
     import altair as alt
 
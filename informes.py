@@ -0,0 +1,481 @@
+# -*- coding: utf-8 -*-
+"""
+Datos agregados para los Informes (Ganancias por Día, Ranking de Clientes y Ranking de Artículos).
+
+Orígenes posibles (parámetro origen de obtener_agrupado):
+- "hechos" (por defecto): lee la tabla pre-agregada ventas_diarias (ver ventas_diarias.py).
+  Los meses ya cerrados se guardan en memoria como totales por id (día, cliente o artículo)
+  y se reutilizan mientras ventas_diarias_meses no indique cambios en ese mes; solo el mes
+  en curso y los meses incompletos de un rango se consultan siempre.
+- "sql": agrupa en PostgreSQL sobre remitos/remito_items; solo viajan las filas agregadas.
+- "pandas": camino original (todas las filas de items + ganancias.calcular_ganancias +
+  groupby), disponible para contrastar resultados.
+
+Los períodos pueden ser cualquier rango de fechas (mes, trimestre, año o personalizado) y
+comparar_con_anio_anterior arma la comparación contra el mismo rango del año anterior.
+
+Uso por línea de comandos:
+    python informes.py <año> <mes>   -> compara hechos y SQL contra pandas para ese mes
+"""
+import sys
+import calendar
+import datetime
+import threading
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+import streamlit as st
+from sqlalchemy import text
+from models import engine
+from ganancias import calcular_ganancias, VENDIDOS_SQL, VENTA_SQL, UTILIDAD_SQL
+
+# Origen por defecto de los informes: "hechos", "sql" o "pandas"
+ORIGEN = "hechos"
+
+MESES = [
+    "Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio",
+    "Julio", "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre"
+]
+
+_FROM_ITEMS_SQL = """
+    FROM remitos r
+    JOIN clientes c ON r.cliente_id = c.id
+    JOIN remito_items ri ON r.id = ri.remito_id
+    JOIN articulos a ON ri.articulo_id = a.id
+    LEFT JOIN rubros rub ON a.rubro_id = rub.id
+    WHERE r.fecha_retiro IS NOT NULL
+      AND r.fecha_retiro >= :start_date
+      AND r.fecha_retiro <= :end_date
+"""
+
+# Columnas de datos de cada item que necesita calcular_ganancias (camino pandas)
+_ITEM_COLS_SQL = """
+    r.id AS remito_id,
+    COALESCE(r.porc_dto, c.porc_dto, 0) AS porc_dto,
+    ri.entregados,
+    COALESCE(ri.devueltos, 0) AS devueltos,
+    COALESCE(ri.precio_real_item, a.precio_real, 0) AS precio_real,
+    COALESCE(a.costo, 0) AS costo
+"""
+
+# Definición de cada informe:
+#   claves: [(expresión SQL, nombre de columna)] que identifican el grupo; la primera es el id
+#   id_hechos: columna de ventas_diarias equivalente al id del grupo
+#   remitos_hechos: columna de ventas_diarias_clientes por la que se cuentan los remitos,
+#                   o None si alcanza con sumar ventas_diarias.remitos
+#   nombres_sql: consulta que completa las demás claves a partir de los ids (:ids), o None
+#   medidas: nombres de las columnas de cantidad, venta y utilidad del resultado
+#   orden: (columna, ascendente)
+INFORMES = {
+    "dia": {
+        "claves": [("r.fecha_retiro", "fecha_retiro_dt")],
+        "id_hechos": "fecha_retiro",
+        "remitos_hechos": "fecha_retiro",
+        "nombres_sql": None,
+        "medidas": ("cant_articulos", "venta_dia", "utilidad_dia"),
+        "orden": ("fecha_retiro_dt", True),
+    },
+    "cliente": {
+        "claves": [
+            ("c.id", "cliente_id"),
+            ("c.razon_social", "razon_social"),
+            ("COALESCE(c.boca, 0)", "boca"),
+        ],
+        "id_hechos": "cliente_id",
+        "remitos_hechos": "cliente_id",
+        "nombres_sql": """
+            SELECT c.id AS cliente_id, c.razon_social, COALESCE(c.boca, 0) AS boca
+            FROM clientes c
+            WHERE c.id = ANY(:ids)
+        """,
+        "medidas": ("cant_articulos", "venta_cliente", "utilidad_cliente"),
+        "orden": ("utilidad_cliente", False),
+    },
+    "articulo": {
+        "claves": [
+            ("a.id", "articulo_id"),
+            ("COALESCE(a.nro_articulo, '')", "nro_articulo"),
+            ("COALESCE(a.descripcion, '')", "descripcion"),
+            ("COALESCE(rub.nombre_rubro, 'Sin Rubro')", "rubro_nombre"),
+        ],
+        "id_hechos": "articulo_id",
+        "remitos_hechos": None,
+        "nombres_sql": """
+            SELECT a.id AS articulo_id,
+                   COALESCE(a.nro_articulo, '') AS nro_articulo,
+                   COALESCE(a.descripcion, '') AS descripcion,
+                   COALESCE(rub.nombre_rubro, 'Sin Rubro') AS rubro_nombre
+            FROM articulos a
+            LEFT JOIN rubros rub ON a.rubro_id = rub.id
+            WHERE a.id = ANY(:ids)
+        """,
+        "medidas": ("cant_articulos", "venta_articulo", "utilidad_articulo"),
+        "orden": ("utilidad_articulo", False),
+    },
+}
+
+def _nombres_claves(informe):
+    return [n for _, n in INFORMES[informe]["claves"]]
+
+def _columnas_medidas(informe):
+    return list(INFORMES[informe]["medidas"]) + ["cant_remitos"]
+
+def _agrupado_sql(conn, informe, fecha_inicio, fecha_fin) -> pd.DataFrame:
+    """Agrupación hecha por PostgreSQL: una fila por grupo."""
+    definicion = INFORMES[informe]
+    cant, venta, utilidad = definicion["medidas"]
+    claves_select = ",\n    ".join(f"{expr} AS {nombre}" for expr, nombre in definicion["claves"])
+    claves_group = ", ".join(expr for expr, _ in definicion["claves"])
+    query = text(f"""
+        SELECT
+            {claves_select},
+            SUM({VENDIDOS_SQL}) AS {cant},
+            SUM({VENTA_SQL}) AS {venta},
+            SUM({UTILIDAD_SQL}) AS {utilidad},
+            COUNT(DISTINCT r.id) AS cant_remitos
+        {_FROM_ITEMS_SQL}
+        GROUP BY {claves_group}
+    """)
+    return pd.read_sql(query, conn, params={"start_date": fecha_inicio, "end_date": fecha_fin})
+
+def _agrupado_pandas(conn, informe, fecha_inicio, fecha_fin) -> pd.DataFrame:
+    """Camino original: trae todos los items del período y agrupa en pandas."""
+    definicion = INFORMES[informe]
+    cant, venta, utilidad = definicion["medidas"]
+    claves_select = ",\n    ".join(f"{expr} AS {nombre}" for expr, nombre in definicion["claves"])
+    query = text(f"""
+        SELECT
+            {claves_select},
+            {_ITEM_COLS_SQL}
+        {_FROM_ITEMS_SQL}
+    """)
+    df_raw = pd.read_sql(query, conn, params={"start_date": fecha_inicio, "end_date": fecha_fin})
+    if df_raw.empty:
+        return pd.DataFrame(columns=_nombres_claves(informe) + _columnas_medidas(informe))
+
+    if "fecha_retiro_dt" in df_raw.columns:
+        df_raw["fecha_retiro_dt"] = pd.to_datetime(df_raw["fecha_retiro_dt"]).dt.date
+
+    calcular_ganancias(df_raw)
+    return df_raw.groupby(_nombres_claves(informe)).agg(
+        **{
+            cant: ("vendidos", "sum"),
+            venta: ("venta_total", "sum"),
+            utilidad: ("utilidad", "sum"),
+            "cant_remitos": ("remito_id", "nunique"),
+        }
+    ).reset_index()
+
+# --- Origen "hechos": totales por id sobre ventas_diarias, con caché de meses cerrados ---
+
+def _totales_hechos(conn, informe, fecha_inicio, fecha_fin) -> pd.DataFrame:
+    """
+    Totales por id del grupo (fecha, cliente_id o articulo_id) leídos de ventas_diarias.
+    Todas las medidas son sumables entre períodos disjuntos: cada remito tiene una sola
+    fecha de retiro, así que los conteos de remitos tampoco se duplican al combinar meses.
+    """
+    definicion = INFORMES[informe]
+    cant, venta, utilidad = definicion["medidas"]
+    id_col = definicion["id_hechos"]
+    id_nombre = _nombres_claves(informe)[0]
+    params = {"start_date": fecha_inicio, "end_date": fecha_fin}
+
+    remitos = definicion["remitos_hechos"]
+    if remitos is None:
+        query = text(f"""
+            SELECT f.{id_col} AS {id_nombre},
+                   SUM(f.vendidos) AS {cant},
+                   SUM(f.venta) AS {venta},
+                   SUM(f.utilidad) AS {utilidad},
+                   SUM(f.remitos) AS cant_remitos
+            FROM ventas_diarias f
+            WHERE f.fecha_retiro >= :start_date AND f.fecha_retiro <= :end_date
+            GROUP BY f.{id_col}
+        """)
+    else:
+        query = text(f"""
+            WITH agg AS (
+                SELECT f.{id_col} AS clave,
+                       SUM(f.vendidos) AS {cant},
+                       SUM(f.venta) AS {venta},
+                       SUM(f.utilidad) AS {utilidad}
+                FROM ventas_diarias f
+                WHERE f.fecha_retiro >= :start_date AND f.fecha_retiro <= :end_date
+                GROUP BY f.{id_col}
+            ), rem AS (
+                SELECT vc.{remitos} AS clave, SUM(vc.remitos) AS cant_remitos
+                FROM ventas_diarias_clientes vc
+                WHERE vc.fecha_retiro >= :start_date AND vc.fecha_retiro <= :end_date
+                GROUP BY vc.{remitos}
+            )
+            SELECT agg.clave AS {id_nombre}, agg.{cant}, agg.{venta}, agg.{utilidad},
+                   COALESCE(rem.cant_remitos, 0) AS cant_remitos
+            FROM agg
+            LEFT JOIN rem ON rem.clave = agg.clave
+        """)
+    return pd.read_sql(query, conn, params=params)
+
+def _combinar_totales(informe, partes) -> pd.DataFrame:
+    """Suma los totales por id de varios períodos."""
+    id_nombre = _nombres_claves(informe)[0]
+    partes = [p for p in partes if not p.empty]
+    if not partes:
+        return pd.DataFrame(columns=[id_nombre] + _columnas_medidas(informe))
+    if len(partes) == 1:
+        return partes[0].copy()
+    return pd.concat(partes, ignore_index=True).groupby(id_nombre, as_index=False)[_columnas_medidas(informe)].sum()
+
+def _agregar_nombres(conn, informe, totales) -> pd.DataFrame:
+    """Completa razón social, descripción, rubro, etc. con los datos actuales de los maestros."""
+    nombres_sql = INFORMES[informe]["nombres_sql"]
+    if nombres_sql is None or totales.empty:
+        return totales
+    id_nombre = _nombres_claves(informe)[0]
+    ids = [int(i) for i in totales[id_nombre]]
+    nombres = pd.read_sql(text(nombres_sql), conn, params={"ids": ids})
+    agrupado = nombres.merge(totales, on=id_nombre, how="inner")
+    return agrupado[_nombres_claves(informe) + _columnas_medidas(informe)]
+
+# Caché de meses cerrados: (informe, primer día del mes) -> (marca de ventas_diarias_meses, totales)
+_meses_lock = threading.Lock()
+_meses_cache = {}
+
+def _segmentos_mensuales(fecha_inicio, fecha_fin):
+    """Parte el rango en tramos de a lo sumo un mes: [(desde, hasta, primer día del mes, mes completo)]."""
+    segmentos = []
+    desde = fecha_inicio
+    while desde <= fecha_fin:
+        primero = desde.replace(day=1)
+        ultimo = primero.replace(day=calendar.monthrange(primero.year, primero.month)[1])
+        hasta = min(ultimo, fecha_fin)
+        segmentos.append((desde, hasta, primero, desde == primero and hasta == ultimo))
+        desde = hasta + datetime.timedelta(days=1)
+    return segmentos
+
+def _agrupado_hechos(conn, informe, fecha_inicio, fecha_fin) -> pd.DataFrame:
+    """
+    Agrupación sobre ventas_diarias combinando meses cerrados cacheados con consultas
+    en vivo para el mes en curso y los meses incompletos del rango.
+    """
+    inicio_mes_actual = datetime.date.today().replace(day=1)
+    segmentos = _segmentos_mensuales(fecha_inicio, fecha_fin)
+    cerrados = [mes for _, _, mes, completo in segmentos if completo and mes < inicio_mes_actual]
+
+    marcas = {}
+    if cerrados:
+        marcas = dict(conn.execute(text("""
+            SELECT mes, actualizado FROM ventas_diarias_meses WHERE mes = ANY(:meses)
+        """), {"meses": cerrados}).fetchall())
+
+    partes = []
+    for desde, hasta, mes, completo in segmentos:
+        if not (completo and mes < inicio_mes_actual):
+            partes.append(_totales_hechos(conn, informe, desde, hasta))
+            continue
+
+        clave = (informe, mes)
+        marca = marcas.get(mes)
+        with _meses_lock:
+            cacheado = _meses_cache.get(clave)
+        if cacheado is not None and cacheado[0] == marca:
+            partes.append(cacheado[1])
+            continue
+
+        # La marca se leyó antes que los totales: si el mes cambia en el medio,
+        # la próxima consulta verá otra marca y lo recalculará
+        totales = _totales_hechos(conn, informe, desde, hasta)
+        with _meses_lock:
+            _meses_cache[clave] = (marca, totales)
+        partes.append(totales)
+
+    return _agregar_nombres(conn, informe, _combinar_totales(informe, partes))
+
+def invalidate_informes_cache():
+    """Descarta los totales cacheados de meses cerrados (solo en este proceso)."""
+    with _meses_lock:
+        _meses_cache.clear()
+
+_ORIGENES = {
+    "hechos": _agrupado_hechos,
+    "sql": _agrupado_sql,
+    "pandas": _agrupado_pandas,
+}
+
+def obtener_agrupado(informe: str, fecha_inicio, fecha_fin, origen: str = None) -> pd.DataFrame:
+    """
+    Devuelve el informe agrupado ("dia", "cliente" o "articulo") para remitos con
+    fecha_retiro entre fecha_inicio y fecha_fin (inclusive), ya ordenado.
+    Columnas: las claves del informe, cant_articulos, venta_*, utilidad_* y cant_remitos.
+    origen: "hechos", "sql" o "pandas" (por defecto ORIGEN).
+    """
+    agrupar = _ORIGENES[origen or ORIGEN]
+    with engine.begin() as conn:
+        agrupado = agrupar(conn, informe, fecha_inicio, fecha_fin)
+
+    return _normalizar(informe, agrupado)
+
+def _normalizar(informe, agrupado) -> pd.DataFrame:
+    """Tipos y orden homogéneos sin importar de dónde vino la agrupación."""
+    definicion = INFORMES[informe]
+    cant, venta, utilidad = definicion["medidas"]
+    if agrupado.empty:
+        return agrupado.reset_index(drop=True)
+
+    agrupado[cant] = agrupado[cant].astype("int64")
+    agrupado["cant_remitos"] = agrupado["cant_remitos"].astype("int64")
+    agrupado[venta] = agrupado[venta].astype("float64")
+    agrupado[utilidad] = agrupado[utilidad].astype("float64")
+    if "fecha_retiro_dt" in agrupado.columns:
+        agrupado["fecha_retiro_dt"] = pd.to_datetime(agrupado["fecha_retiro_dt"]).dt.date
+
+    columna, ascendente = definicion["orden"]
+    desempate = _nombres_claves(informe)[0]
+    columnas_orden = [columna] if columna == desempate else [columna, desempate]
+    return agrupado.sort_values(by=columnas_orden, ascending=[ascendente] + [True] * (len(columnas_orden) - 1)).reset_index(drop=True)
+
+# --- Períodos y comparación interanual ---
+
+def rango_mes(anio, mes):
+    return datetime.date(anio, mes, 1), datetime.date(anio, mes, calendar.monthrange(anio, mes)[1])
+
+def rango_trimestre(anio, trimestre):
+    inicio, _ = rango_mes(anio, 3 * (trimestre - 1) + 1)
+    _, fin = rango_mes(anio, 3 * trimestre)
+    return inicio, fin
+
+def rango_anio(anio):
+    return datetime.date(anio, 1, 1), datetime.date(anio, 12, 31)
+
+def _mismo_dia_anio_anterior(fecha):
+    # El 29 de febrero pasa al 28
+    dia = min(fecha.day, calendar.monthrange(fecha.year - 1, fecha.month)[1])
+    return fecha.replace(year=fecha.year - 1, day=dia)
+
+def rango_anio_anterior(fecha_inicio, fecha_fin):
+    """El mismo rango de fechas, un año antes."""
+    return _mismo_dia_anio_anterior(fecha_inicio), _mismo_dia_anio_anterior(fecha_fin)
+
+def totales(informe, agrupado) -> dict:
+    """Totales del período a partir de un informe agrupado."""
+    cant, venta, utilidad = INFORMES[informe]["medidas"]
+    if agrupado.empty:
+        return {"remitos": 0, "articulos": 0, "venta": 0.0, "utilidad": 0.0}
+    return {
+        "remitos": int(agrupado["cant_remitos"].sum()),
+        "articulos": int(agrupado[cant].sum()),
+        "venta": float(agrupado[venta].sum()),
+        "utilidad": float(agrupado[utilidad].sum()),
+    }
+
+def comparar_con_anio_anterior(informe, fecha_inicio, fecha_fin, origen=None):
+    """
+    Devuelve (totales_actual, totales_anterior, rango_anterior) para el rango pedido y el
+    mismo rango del año anterior. Con el origen "hechos" el año anterior sale casi siempre
+    de meses cerrados cacheados.
+    """
+    anterior_inicio, anterior_fin = rango_anio_anterior(fecha_inicio, fecha_fin)
+    actual = obtener_agrupado(informe, fecha_inicio, fecha_fin, origen=origen)
+    anterior = obtener_agrupado(informe, anterior_inicio, anterior_fin, origen=origen)
+    return totales(informe, actual), totales(informe, anterior), (anterior_inicio, anterior_fin)
+
+Periodo = namedtuple("Periodo", ["inicio", "fin", "etiqueta", "sufijo"])
+
+def selector_periodo(prefijo) -> Periodo:
+    """
+    Controles de selección de período compartidos por las páginas de Informes.
+    prefijo: prefijo de las keys de session_state (ej. "info_ganancias").
+    Conserva las keys <prefijo>_mes y <prefijo>_anio del selector mensual original.
+    """
+    today = datetime.date.today()
+    min_year = min(2026, today.year)
+    max_year = max(2050, today.year)
+    anios_disponibles = list(range(min_year, max_year + 1))
+
+    col_tipo, col_a, col_b, _ = st.columns([2, 2, 2, 2], gap="small")
+    with col_tipo:
+        tipo = st.selectbox("Período", options=["Mes", "Trimestre", "Año", "Personalizado"], key=f"{prefijo}_periodo")
+
+    if tipo == "Personalizado":
+        with col_a:
+            desde = st.date_input("Desde", value=today.replace(day=1), format="DD/MM/YYYY", key=f"{prefijo}_desde")
+        with col_b:
+            hasta = st.date_input("Hasta", value=today, format="DD/MM/YYYY", key=f"{prefijo}_hasta")
+        if hasta < desde:
+            desde, hasta = hasta, desde
+        etiqueta = f"{desde.strftime('%d/%m/%Y')} - {hasta.strftime('%d/%m/%Y')}"
+        return Periodo(desde, hasta, etiqueta, f"{desde:%Y%m%d}_{hasta:%Y%m%d}")
+
+    with col_b:
+        anio_num = st.selectbox("Año", options=anios_disponibles, index=anios_disponibles.index(today.year), key=f"{prefijo}_anio")
+
+    if tipo == "Mes":
+        with col_a:
+            mes_nombre = st.selectbox("Mes", options=MESES, index=today.month - 1, key=f"{prefijo}_mes")
+        mes_num = MESES.index(mes_nombre) + 1
+        inicio, fin = rango_mes(anio_num, mes_num)
+        return Periodo(inicio, fin, f"{mes_nombre} {anio_num}", f"{anio_num:04d}{mes_num:02d}")
+
+    if tipo == "Trimestre":
+        with col_a:
+            trimestre = st.selectbox("Trimestre", options=[1, 2, 3, 4], index=(today.month - 1) // 3,
+                                     format_func=lambda t: f"{t}º Trimestre", key=f"{prefijo}_trimestre")
+        inicio, fin = rango_trimestre(anio_num, trimestre)
+        return Periodo(inicio, fin, f"{trimestre}º Trimestre {anio_num}", f"{anio_num:04d}T{trimestre}")
+
+    inicio, fin = rango_anio(anio_num)
+    return Periodo(inicio, fin, f"Año {anio_num}", f"{anio_num:04d}")
+
+def mostrar_comparacion_anio_anterior(informe, periodo: Periodo):
+    """Métricas del período contra el mismo rango del año anterior (con variación)."""
+    actual, anterior, (ant_inicio, ant_fin) = comparar_con_anio_anterior(informe, periodo.inicio, periodo.fin)
+
+    def variacion(clave):
+        if not anterior[clave]:
+            return None
+        return f"{(actual[clave] - anterior[clave]) / abs(anterior[clave]) * 100.0:+.1f} %"
+
+    st.markdown(f"**Comparación con el año anterior** ({ant_inicio.strftime('%d/%m/%Y')} - {ant_fin.strftime('%d/%m/%Y')})")
+    c1, c2, c3, c4 = st.columns(4, gap="small")
+    c1.metric("Remitos", f"{actual['remitos']:,}", variacion("remitos"), help=f"Año anterior: {anterior['remitos']:,}")
+    c2.metric("Artículos Vendidos", f"{actual['articulos']:,}", variacion("articulos"), help=f"Año anterior: {anterior['articulos']:,}")
+    c3.metric("Venta Total", f"$ {actual['venta']:,.2f}", variacion("venta"), help=f"Año anterior: $ {anterior['venta']:,.2f}")
+    c4.metric("Utilidad", f"$ {actual['utilidad']:,.2f}", variacion("utilidad"), help=f"Año anterior: $ {anterior['utilidad']:,.2f}")
+
+def comparar_origenes(informe: str, fecha_inicio, fecha_fin, origen="sql", referencia="pandas", tolerancia=0.005):
+    """
+    Calcula el informe desde dos orígenes y devuelve (coinciden: bool, origen_df, referencia_df).
+    Las cantidades deben coincidir exactamente; los importes hasta la tolerancia indicada.
+    """
+    origen_df = obtener_agrupado(informe, fecha_inicio, fecha_fin, origen=origen)
+    referencia_df = obtener_agrupado(informe, fecha_inicio, fecha_fin, origen=referencia)
+    if len(origen_df) != len(referencia_df):
+        return False, origen_df, referencia_df
+    if origen_df.empty:
+        return True, origen_df, referencia_df
+
+    cant, venta, utilidad = INFORMES[informe]["medidas"]
+    claves = _nombres_claves(informe)
+    a = origen_df.sort_values(claves).reset_index(drop=True)
+    b = referencia_df.sort_values(claves).reset_index(drop=True)
+    coinciden = (
+        a[claves].astype(str).equals(b[claves].astype(str))
+        and np.array_equal(a[cant].to_numpy(), b[cant].to_numpy())
+        and np.array_equal(a["cant_remitos"].to_numpy(), b["cant_remitos"].to_numpy())
+        and np.allclose(a[venta].to_numpy(), b[venta].to_numpy(), rtol=0, atol=tolerancia)
+        and np.allclose(a[utilidad].to_numpy(), b[utilidad].to_numpy(), rtol=0, atol=tolerancia)
+    )
+    return coinciden, origen_df, referencia_df
+
+if __name__ == "__main__":
+    hoy = datetime.date.today()
+    anio = int(sys.argv[1]) if len(sys.argv) > 1 else hoy.year
+    mes = int(sys.argv[2]) if len(sys.argv) > 2 else hoy.month
+    inicio, fin = rango_mes(anio, mes)
+
+    todo_ok = True
+    for nombre in INFORMES:
+        for origen in ("hechos", "sql"):
+            ok, origen_df, pandas_df = comparar_origenes(nombre, inicio, fin, origen=origen)
+            todo_ok = todo_ok and ok
+            print(f"[{'OK ' if ok else 'NO '}] {nombre}: {len(origen_df)} grupos ({origen}) / {len(pandas_df)} grupos (pandas)")
+    raise SystemExit(0 if todo_ok else 1)
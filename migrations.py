@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+"""
+Migraciones versionadas del esquema PostgreSQL.
+
+Cada migración tiene un número de versión, una descripción y la lista de sentencias
+a ejecutar. La versión aplicada queda registrada en la tabla schema_version, por lo
+que cada paso corre una sola vez y en orden.
+
+Uso por línea de comandos (desde la carpeta del proyecto):
+    python migrations.py            -> aplica las migraciones pendientes
+    python migrations.py --check    -> muestra el EXPLAIN real de las consultas críticas
+    python migrations.py --check --forzar-indice -> idem desalentando el Seq Scan (solo
+                                       confirma que el índice está disponible)
+"""
+import sys
+from sqlalchemy import text
+
+# Número arbitrario para el advisory lock: evita que dos procesos migren a la vez
+MIGRATIONS_LOCK_ID = 20260101
+
+# (versión, descripción, sentencias) - Agregar siempre al final con versión creciente.
+# Las sentencias van escritas tal como se versionaron (no tomadas de constantes de otros
+# módulos): un cambio posterior del esquema es una migración nueva.
+MIGRATIONS = [
+    (1, "Columna devueltos en remito_items", [
+        "ALTER TABLE remito_items ADD COLUMN IF NOT EXISTS devueltos INTEGER DEFAULT 0",
+    ]),
+    (2, "Índices de remito_items por remito y por artículo", [
+        "CREATE INDEX IF NOT EXISTS idx_remito_items_remito_id ON remito_items (remito_id)",
+        "CREATE INDEX IF NOT EXISTS idx_remito_items_articulo_id ON remito_items (articulo_id)",
+    ]),
+    (3, "Índices de remitos por fecha de retiro y por cliente/fecha de entrega", [
+        "CREATE INDEX IF NOT EXISTS idx_remitos_fecha_retiro ON remitos (fecha_retiro)",
+        "CREATE INDEX IF NOT EXISTS idx_remitos_cliente_fecha_entrega ON remitos (cliente_id, fecha_entrega)",
+    ]),
+    (4, "Tablas de hechos ventas_diarias y ventas_diarias_clientes (con carga inicial)", [
+        """
+        CREATE TABLE IF NOT EXISTS ventas_diarias (
+            fecha_retiro DATE NOT NULL,
+            cliente_id INTEGER NOT NULL,
+            articulo_id INTEGER NOT NULL,
+            vendidos BIGINT NOT NULL DEFAULT 0,
+            venta DOUBLE PRECISION NOT NULL DEFAULT 0,
+            utilidad DOUBLE PRECISION NOT NULL DEFAULT 0,
+            remitos INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (fecha_retiro, cliente_id, articulo_id)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_ventas_diarias_cliente ON ventas_diarias (cliente_id)",
+        "CREATE INDEX IF NOT EXISTS idx_ventas_diarias_articulo ON ventas_diarias (articulo_id)",
+        """
+        CREATE TABLE IF NOT EXISTS ventas_diarias_clientes (
+            fecha_retiro DATE NOT NULL,
+            cliente_id INTEGER NOT NULL,
+            remitos INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (fecha_retiro, cliente_id)
+        )
+        """,
+        "DELETE FROM ventas_diarias",
+        "DELETE FROM ventas_diarias_clientes",
+        """
+        INSERT INTO ventas_diarias (fecha_retiro, cliente_id, articulo_id, vendidos, venta, utilidad, remitos)
+        SELECT r.fecha_retiro, r.cliente_id, ri.articulo_id,
+               SUM(GREATEST(COALESCE(ri.entregados, 0) - COALESCE(ri.devueltos, 0), 0)),
+               SUM(CASE WHEN (CAST(COALESCE(ri.precio_real_item, a.precio_real, 0) AS DOUBLE PRECISION) > 0
+                              AND GREATEST(COALESCE(ri.entregados, 0) - COALESCE(ri.devueltos, 0), 0) > 0)
+                   THEN (CAST(COALESCE(ri.precio_real_item, a.precio_real, 0) AS DOUBLE PRECISION)
+                         * (1.0 - CAST(COALESCE(r.porc_dto, c.porc_dto, 0) AS DOUBLE PRECISION) / 100.0))
+                        * GREATEST(COALESCE(ri.entregados, 0) - COALESCE(ri.devueltos, 0), 0)
+                   ELSE 0 END),
+               SUM(CASE WHEN (CAST(COALESCE(ri.precio_real_item, a.precio_real, 0) AS DOUBLE PRECISION) > 0
+                              AND GREATEST(COALESCE(ri.entregados, 0) - COALESCE(ri.devueltos, 0), 0) > 0)
+                   THEN ((CAST(COALESCE(ri.precio_real_item, a.precio_real, 0) AS DOUBLE PRECISION)
+                          * (1.0 - CAST(COALESCE(r.porc_dto, c.porc_dto, 0) AS DOUBLE PRECISION) / 100.0))
+                         - CAST(COALESCE(a.costo, 0) AS DOUBLE PRECISION))
+                        * GREATEST(COALESCE(ri.entregados, 0) - COALESCE(ri.devueltos, 0), 0)
+                   ELSE 0 END),
+               COUNT(DISTINCT r.id)
+        FROM remitos r
+        JOIN clientes c ON r.cliente_id = c.id
+        JOIN remito_items ri ON r.id = ri.remito_id
+        JOIN articulos a ON ri.articulo_id = a.id
+        WHERE r.fecha_retiro IS NOT NULL
+        GROUP BY r.fecha_retiro, r.cliente_id, ri.articulo_id
+        """,
+        """
+        INSERT INTO ventas_diarias_clientes (fecha_retiro, cliente_id, remitos)
+        SELECT r.fecha_retiro, r.cliente_id, COUNT(*)
+        FROM remitos r
+        WHERE r.fecha_retiro IS NOT NULL
+          AND EXISTS (SELECT 1 FROM remito_items ri WHERE ri.remito_id = r.id)
+        GROUP BY r.fecha_retiro, r.cliente_id
+        """,
+    ]),
+    (5, "Marcas de modificación por mes de ventas_diarias (caché de meses cerrados)", [
+        """
+        CREATE TABLE IF NOT EXISTS ventas_diarias_meses (
+            mes DATE PRIMARY KEY,
+            actualizado TIMESTAMP NOT NULL
+        )
+        """,
+        "UPDATE ventas_diarias_meses SET actualizado = clock_timestamp()",
+        """
+        INSERT INTO ventas_diarias_meses (mes, actualizado)
+        SELECT m.mes, clock_timestamp()
+        FROM (SELECT DISTINCT CAST(date_trunc('month', fecha_retiro) AS DATE) AS mes FROM ventas_diarias) m
+        ON CONFLICT (mes) DO UPDATE SET actualizado = EXCLUDED.actualizado
+        """,
+    ]),
+    (6, "Historial de backups y restauraciones (base de los backups incrementales)", [
+        """
+        CREATE TABLE IF NOT EXISTS backup_historial (
+            id SERIAL PRIMARY KEY,
+            fecha TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            tipo TEXT NOT NULL,
+            backup_id TEXT,
+            base_id TEXT,
+            marcas TEXT
+        )
+        """,
+    ]),
+]
+
+# Consultas críticas y el índice que deberían usar: (descripción, sql, índice esperado)
+HOT_QUERIES = [
+    ("Items de un remito (get_remito_completo)",
+     "SELECT * FROM remito_items WHERE remito_id = 1",
+     "idx_remito_items_remito_id"),
+    ("Uso de un artículo en remitos (check_article_in_remitos)",
+     "SELECT COUNT(*) FROM remito_items WHERE articulo_id = 1",
+     "idx_remito_items_articulo_id"),
+    ("Remitos retirados en un mes (Informes)",
+     "SELECT id FROM remitos WHERE fecha_retiro >= DATE '2026-01-01' AND fecha_retiro <= DATE '2026-01-31'",
+     "idx_remitos_fecha_retiro"),
+    ("Remito abierto del cliente (save_remito)",
+     "SELECT id FROM remitos WHERE cliente_id = 1 AND fecha_entrega = DATE '2026-01-01' AND fecha_retiro IS NULL",
+     "idx_remitos_cliente_fecha_entrega"),
+]
+
+def get_schema_version(conn):
+    """Devuelve la última versión de esquema aplicada (0 si no hay ninguna)."""
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            descripcion TEXT NOT NULL,
+            fecha_aplicada TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    """))
+    return conn.execute(text("SELECT COALESCE(MAX(version), 0) FROM schema_version")).scalar()
+
+def apply_migrations(conn):
+    """
+    Aplica, dentro de la transacción de conn, las migraciones cuya versión sea
+    mayor a la registrada en schema_version.
+    Retorna la lista de versiones aplicadas.
+    """
+    conn.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {"lock_id": MIGRATIONS_LOCK_ID})
+    actual = get_schema_version(conn)
+
+    aplicadas = []
+    for version, descripcion, sentencias in sorted(MIGRATIONS, key=lambda m: m[0]):
+        if version <= actual:
+            continue
+        for sql in sentencias:
+            conn.execute(text(sql))
+        conn.execute(text("""
+            INSERT INTO schema_version (version, descripcion) VALUES (:v, :d)
+        """), {"v": version, "d": descripcion})
+        aplicadas.append(version)
+    return aplicadas
+
+def check_hot_queries(conn, force_index=False):
+    """
+    Ejecuta EXPLAIN sobre las consultas críticas e informa si el plan que elige el
+    planificador usa el índice esperado.
+    Con force_index=True se desalienta el Seq Scan (solo dentro de esta transacción): así
+    solo se confirma que el índice existe y es utilizable (con tablas chicas el planificador
+    prefiere el Seq Scan), no que se use.
+    Retorna una lista de dicts con consulta, indice, usa_indice y plan.
+    """
+    if force_index:
+        conn.execute(text("SET LOCAL enable_seqscan = off"))
+
+    resultados = []
+    for descripcion, sql, indice in HOT_QUERIES:
+        plan = "\n".join(r[0] for r in conn.execute(text(f"EXPLAIN {sql}")).fetchall())
+        resultados.append({
+            "consulta": descripcion,
+            "indice": indice,
+            "usa_indice": indice in plan,
+            "plan": plan
+        })
+    return resultados
+
+if __name__ == "__main__":
+    from models import engine
+
+    if "--check" in sys.argv:
+        with engine.begin() as conn:
+            forzado = "--forzar-indice" in sys.argv
+            if forzado:
+                print("Seq Scan desalentado: DISPONIBLE indica que el índice existe y es utilizable, no que se use\n")
+            for r in check_hot_queries(conn, force_index=forzado):
+                if forzado:
+                    estado = "DISPONIBLE" if r["usa_indice"] else "NO DISPONIBLE"
+                else:
+                    estado = "USADO" if r["usa_indice"] else "NO USADO"
+                print(f"[{estado}] {r['consulta']} -> {r['indice']}")
+                print("      " + r["plan"].replace("\n", "\n      "))
+    else:
+        with engine.begin() as conn:
+            aplicadas = apply_migrations(conn)
+            print(f"Migraciones aplicadas: {aplicadas or 'ninguna'} (versión actual: {get_schema_version(conn)})")
@@ -1,9 +1,15 @@
 # -*- coding: utf-8 -*-
 import os
+import io
+import threading
+from collections import OrderedDict
 import pandas as pd
 from sqlalchemy import create_engine, text
 import streamlit as st
 from datetime import datetime
+from migrations import apply_migrations
+from catalogo import CatalogoIndex
+import ventas_diarias
 
 # Obtener la cadena de conexión desde secrets
 # Local: en .streamlit/secrets.toml
@@ -94,6 +100,8 @@ def init_db():
         );
         """))
 
+        # Aplicar migraciones pendientes (columnas nuevas e índices)
+        apply_migrations(conn)
 
         # Insertar datos demo si no existen
         clientes = conn.execute(text("SELECT COUNT(*) FROM clientes")).scalar()
@@ -132,19 +140,251 @@ def init_db():
             except Exception as e:
                 pass
             
-def get_clients_and_articles():
+# Estado de la inicialización del esquema, compartido por todas las sesiones del proceso
+_db_init_lock = threading.Lock()
+_db_init_result = None
+
+def ensure_db_initialized():
+    """
+    Ejecuta init_db una sola vez por proceso del servidor (no por sesión del navegador).
+    Las sesiones siguientes encuentran el resultado cacheado y no consultan la base.
+    Si init_db falla no se marca como hecho, para reintentar en la próxima sesión.
+    """
+    global _db_init_result
+    if _db_init_result is not None:
+        return _db_init_result
+
+    with _db_init_lock:
+        # Otra sesión pudo haber terminado la inicialización mientras esperábamos el lock
+        if _db_init_result is None:
+            init_db()
+            _db_init_result = datetime.now()
+    return _db_init_result
+
+# Caché de clientes y artículos compartido por todas las sesiones del proceso.
+# Se valida con una sonda barata (max fecha_mod + cantidad de filas) y las escrituras
+# propias lo invalidan al instante con invalidate_catalog_cache(). El lock solo protege
+# el intercambio del contenido; la recarga corre fuera de él.
+_catalog_lock = threading.Lock()
+_catalog_cache = {"version": None, "clientes": None, "articulos": None, "indice": None, "generacion": 0}
+
+def _get_catalog_version(conn):
+    """Sonda de versión del catálogo: una sola fila con max(fecha_mod) y count(*) de cada tabla."""
+    return tuple(conn.execute(text("""
+        SELECT a.max_mod, a.cant, c.max_mod, c.cant
+        FROM (SELECT MAX(fecha_mod) AS max_mod, COUNT(*) AS cant FROM articulos) a,
+             (SELECT MAX(fecha_mod) AS max_mod, COUNT(*) AS cant FROM clientes) c
+    """)).first())
+
+def invalidate_catalog_cache():
+    """
+    Fuerza la recarga del catálogo compartido en la próxima lectura.
+    También descarta los snapshots de remitos, que incluyen datos de clientes y artículos.
+    """
+    with _catalog_lock:
+        _catalog_cache["version"] = None
+        _catalog_cache["generacion"] += 1
+    invalidate_remito_snapshot()
+
+def get_catalog():
+    """
+    Devuelve (clientes_df, articulos_df, indice) desde el caché compartido del proceso.
+    Solo se vuelve a leer la base completa (y a construir el CatalogoIndex) si la sonda
+    de versión cambió. Los DataFrames son copias porque las páginas les agregan columnas;
+    el índice es de solo lectura y se comparte entre sesiones.
+    La recarga no toma el lock, así que una sesión lenta recargando no demora a las que
+    encuentran el caché vigente; al terminar solo intercambia el contenido bajo el lock.
+    """
     with engine.begin() as conn:
-        clientes_df = pd.read_sql("SELECT id, razon_social, boca, porc_dto FROM clientes", conn)
-        # Se agrega la columna 'precio_real' a la consulta.
-        articulos_df = pd.read_sql("SELECT id, nro_articulo, descripcion, precio_publico, precio_real, COALESCE(costo, 0) AS costo FROM articulos", conn)
+        version = _get_catalog_version(conn)
+        with _catalog_lock:
+            generacion = _catalog_cache["generacion"]
+            vigente = version == _catalog_cache["version"]
+            clientes_df = _catalog_cache["clientes"]
+            articulos_df = _catalog_cache["articulos"]
+            indice = _catalog_cache["indice"]
+
+        if not vigente:
+            clientes_df = pd.read_sql("SELECT id, razon_social, boca, porc_dto FROM clientes", conn)
+            # Se agrega la columna 'precio_real' a la consulta.
+            articulos_df = pd.read_sql("SELECT id, nro_articulo, descripcion, precio_publico, precio_real, COALESCE(costo, 0) AS costo FROM articulos", conn)
+            indice = CatalogoIndex(clientes_df, articulos_df)
+            with _catalog_lock:
+                # Si hubo una invalidación durante la recarga, lo leído puede ser anterior a esa
+                # escritura: se usa en esta llamada pero no se guarda en el caché
+                if _catalog_cache["generacion"] == generacion:
+                    _catalog_cache.update(version=version, clientes=clientes_df,
+                                          articulos=articulos_df, indice=indice)
+    return clientes_df.copy(), articulos_df.copy(), indice
+
+def get_clients_and_articles():
+    """Devuelve (clientes_df, articulos_df) desde el caché compartido del proceso (ver get_catalog)."""
+    clientes_df, articulos_df, _ = get_catalog()
     return clientes_df, articulos_df
 
+def _values_list(rows, columns, prefix="v"):
+    """
+    Arma una lista VALUES parametrizada para enviar un conjunto de filas en una sola sentencia.
+    Devuelve (texto_values, parametros).
+    """
+    tuplas = []
+    params = {}
+    for i, row in enumerate(rows):
+        nombres = []
+        for col in columns:
+            clave = f"{prefix}_{col}_{i}"
+            params[clave] = row[col]
+            nombres.append(f":{clave}")
+        tuplas.append(f"({', '.join(nombres)})")
+    return ",\n".join(tuplas), params
+
+def _items_entregas_to_rows(items_df):
+    """Convierte la grilla de Entregas a una lista de dicts con tipos nativos de Python."""
+    rows = []
+    for rec in items_df.to_dict("records"):
+        rows.append({
+            "articulo_id": int(rec["id_articulo"]),
+            "entregados": int(rec["Entregados"]),
+            "observaciones": rec["Observaciones"] if pd.notna(rec["Observaciones"]) else None,
+            "precio_real": float(rec["Precio Real"])
+        })
+    return rows
+
+def _sync_precios_articulos(conn, rows, fecha_actual):
+    """
+    Actualiza en una sola sentencia el precio_real del maestro de artículos
+    para todos los items cuyo precio difiere del cargado en el remito.
+    Retorna True si se modificó algún precio.
+    """
+    # Un precio por artículo (el último cargado gana, igual que el recorrido fila a fila)
+    precios = {r["articulo_id"]: r["precio_real"] for r in rows}
+    if not precios:
+        return False
+
+    values_sql, params = _values_list(
+        [{"aid": aid, "pr": pr} for aid, pr in precios.items()], ["aid", "pr"], prefix="p"
+    )
+    params["now"] = fecha_actual
+    modificados = conn.execute(text(f"""
+        UPDATE articulos a
+        SET precio_real = CAST(v.pr AS REAL), fecha_mod = :now
+        FROM (VALUES {values_sql}) AS v(aid, pr)
+        WHERE a.id = v.aid
+          AND a.precio_real IS DISTINCT FROM CAST(v.pr AS REAL)
+        RETURNING a.id
+    """), params).fetchall()
+    return len(modificados) > 0
+
+# Columnas editables de remito_items: clave usada en las filas -> columna en la tabla
+_ITEM_COLUMNS = {
+    "entregados": "entregados",
+    "devueltos": "devueltos",
+    "observaciones": "observaciones_item",
+    "precio_real": "precio_real_item",
+}
+
+def _insert_remito_items(conn, remito_id, rows):
+    """Inserta todos los items del remito con un único INSERT multi-fila."""
+    if not rows:
+        return
+    campos = [c for c in _ITEM_COLUMNS if c in rows[0]]
+    values_sql, params = _values_list(rows, ["articulo_id"] + campos, prefix="i")
+    params["rid"] = remito_id
+    columnas_db = ", ".join(_ITEM_COLUMNS[c] for c in campos)
+    columnas_v = ", ".join(f"v.{c}" for c in campos)
+    conn.execute(text(f"""
+        INSERT INTO remito_items (remito_id, articulo_id, {columnas_db})
+        SELECT :rid, v.articulo_id, {columnas_v}
+        FROM (VALUES {values_sql}) AS v(articulo_id, {", ".join(campos)})
+    """), params)
+
+def _diff_remito_items(actuales, nuevos):
+    """
+    Compara los items grabados de un remito con la grilla editada, usando articulo_id como clave.
+    Retorna (a_insertar, a_actualizar, ids_a_borrar):
+    - a_insertar: filas nuevas (sin item grabado para ese artículo).
+    - a_actualizar: filas con el id del item grabado y algún campo distinto.
+    - ids_a_borrar: ids de remito_items cuyo artículo ya no está en la grilla.
+    """
+    por_articulo = {}
+    ids_a_borrar = []
+    for item in actuales:
+        if item["articulo_id"] in por_articulo:
+            # Item duplicado de datos históricos: se conserva el primero
+            ids_a_borrar.append(item["id"])
+        else:
+            por_articulo[item["articulo_id"]] = item
+
+    a_insertar = []
+    a_actualizar = []
+    for row in nuevos:
+        actual = por_articulo.pop(row["articulo_id"], None)
+        if actual is None:
+            a_insertar.append(row)
+            continue
+        campos = [c for c in _ITEM_COLUMNS if c in row]
+        if any(actual[c] != row[c] for c in campos):
+            a_actualizar.append(dict(row, id=actual["id"]))
+
+    ids_a_borrar.extend(item["id"] for item in por_articulo.values())
+    return a_insertar, a_actualizar, ids_a_borrar
+
+def _apply_remito_items_diff(conn, remito_id, rows):
+    """
+    Sincroniza remito_items con la grilla editada escribiendo solo las diferencias:
+    a lo sumo un INSERT, un UPDATE y un DELETE, cada uno en bloque.
+    """
+    actuales = conn.execute(text("""
+        SELECT id, articulo_id, entregados, devueltos,
+               observaciones_item AS observaciones, precio_real_item AS precio_real
+        FROM remito_items
+        WHERE remito_id = :rid
+        ORDER BY id ASC
+        FOR UPDATE
+    """), {"rid": remito_id}).mappings().all()
+
+    a_insertar, a_actualizar, ids_a_borrar = _diff_remito_items(actuales, rows)
+
+    if ids_a_borrar:
+        conn.execute(text("""
+            DELETE FROM remito_items WHERE id = ANY(:ids)
+        """), {"ids": ids_a_borrar})
+
+    if a_actualizar:
+        campos = [c for c in _ITEM_COLUMNS if c in a_actualizar[0]]
+        values_sql, params = _values_list(a_actualizar, ["id"] + campos, prefix="u")
+        set_sql = ", ".join(f"{_ITEM_COLUMNS[c]} = v.{c}" for c in campos)
+        conn.execute(text(f"""
+            UPDATE remito_items ri
+            SET {set_sql}
+            FROM (VALUES {values_sql}) AS v(id, {", ".join(campos)})
+            WHERE ri.id = v.id
+        """), params)
+
+    _insert_remito_items(conn, remito_id, a_insertar)
+
+def _bloquear_remito(conn, remito_id):
+    """
+    Bloquea la fila del remito hasta el fin de la transacción y devuelve (cliente_id, fecha_retiro)
+    previos a la modificación, o None si no existe. Sirve para recalcular ventas_diarias.
+    """
+    return conn.execute(text("""
+        SELECT cliente_id, fecha_retiro FROM remitos WHERE id = :rid FOR UPDATE
+    """), {"rid": remito_id}).first()
+
 def save_remito(cliente_id, fecha_entrega, fecha_retiro, observaciones_cabecera, porc_dto, items_df):
+    """
+    Guarda (o reemplaza) el remito de Entregas del cliente para la fecha indicada.
+    Los items se escriben en bloque: un UPDATE de precios y un INSERT multi-fila,
+    por lo que la cantidad de consultas no depende de la cantidad de items.
+    Retorna (remito_id, precios_modificados).
+    """
     fecha_actual = datetime.now()
     
     # Asegurar tipos nativos de Python para evitar errores de adaptación de psycopg2 con tipos de pandas/numpy
     cliente_id = int(cliente_id)
     porc_dto_val = float(porc_dto) if pd.notna(porc_dto) else None
+    rows = _items_entregas_to_rows(items_df)
     
     with engine.begin() as conn:
         # Buscar el remito existente por cliente y fechas
@@ -174,48 +414,6 @@ def save_remito(cliente_id, fecha_entrega, fecha_retiro, observaciones_cabecera,
                 DELETE FROM remito_items WHERE remito_id = :rid
             """), {"rid": remito_id})
 
-            # Variable para rastrear si se modificó algún precio
-            precios_modificados = False
-
-            # Se itera sobre el DataFrame para guardar cada item y actualizar precios.
-            for _, row in items_df.iterrows():
-                # Convertir a int/float los tipos de datos
-                articulo_id = int(row['id_articulo'])
-                precio_real_val = float(row['Precio Real'])
-                entregados_val = int(row['Entregados'])
-                
-                # Obtener el precio_real actual de la base de datos
-                current_price_result = conn.execute(text("SELECT precio_real FROM articulos WHERE id = :aid"), 
-                                                     {"aid": articulo_id}).scalar()
-                
-                # Se compara el precio del DataFrame editado con el de la base de datos.
-                if current_price_result != precio_real_val:
-                    # Si el precio es diferente, se actualiza en la tabla de articulos.
-                    conn.execute(text("""
-                        UPDATE articulos
-                        SET precio_real = :new_price, fecha_mod = :now
-                        WHERE id = :aid
-                    """), {
-                        "new_price": precio_real_val,
-                        "now": fecha_actual,
-                        "aid": articulo_id
-                    })
-                    precios_modificados = True # Se marca que hubo una modificación.
-
-                # Insertar el nuevo item, incluyendo el precio real de ese item
-                conn.execute(text("""
-                    INSERT INTO remito_items (remito_id, articulo_id, entregados, observaciones_item, precio_real_item)
-                    VALUES (:remito_id, :articulo_id, :entregados, :observaciones, :precio_real)
-                """), {
-                    "remito_id": remito_id,
-                    "articulo_id": articulo_id,
-                    "entregados": entregados_val,
-                    "observaciones": row["Observaciones"] if pd.notna(row["Observaciones"]) else None,
-                    "precio_real": precio_real_val
-                })
-            
-            return remito_id, precios_modificados
-
         else:
             # Lógica para crear un nuevo remito
             result = conn.execute(text("""
@@ -231,39 +429,17 @@ def save_remito(cliente_id, fecha_entrega, fecha_retiro, observaciones_cabecera,
             })
             remito_id = int(result.scalar())
 
-            precios_modificados = False
-            for _, row in items_df.iterrows():
-                articulo_id = int(row['id_articulo'])
-                precio_real_val = float(row['Precio Real'])
-                entregados_val = int(row['Entregados'])
-                
-                current_price_result = conn.execute(text("SELECT precio_real FROM articulos WHERE id = :aid"), 
-                                                     {"aid": articulo_id}).scalar()
-                
-                if current_price_result != precio_real_val:
-                    conn.execute(text("""
-                        UPDATE articulos
-                        SET precio_real = :new_price, fecha_mod = :now
-                        WHERE id = :aid
-                    """), {
-                        "new_price": precio_real_val,
-                        "now": fecha_actual,
-                        "aid": articulo_id
-                    })
-                    precios_modificados = True
-                
-                conn.execute(text("""
-                    INSERT INTO remito_items (remito_id, articulo_id, entregados, observaciones_item, precio_real_item)
-                    VALUES (:remito_id, :articulo_id, :entregados, :observaciones, :precio_real)
-                """), {
-                    "remito_id": remito_id,
-                    "articulo_id": articulo_id,
-                    "entregados": entregados_val,
-                    "observaciones": row["Observaciones"] if pd.notna(row["Observaciones"]) else None,
-                    "precio_real": precio_real_val
-                })
-            
-            return remito_id, precios_modificados
+        # Sincronizar precios del maestro e insertar items, en bloque
+        precios_modificados = _sync_precios_articulos(conn, rows, fecha_actual)
+        _insert_remito_items(conn, remito_id, rows)
+
+        # Solo impacta en ventas_diarias si el remito se guarda ya cerrado
+        ventas_diarias.recalcular_remito(conn, cliente_id, [fecha_retiro])
+
+    invalidate_remito_snapshot(remito_id)
+    if precios_modificados:
+        invalidate_catalog_cache()
+    return remito_id, precios_modificados
 
 def get_all_rubros():
     """Obtiene todos los rubros de la base de datos."""
@@ -356,6 +532,7 @@ def save_new_articulo(nro_articulo, descripcion, costo, precio_publico, precio_r
             "fa": fecha_actual,
             "fm": fecha_actual
         })
+    invalidate_catalog_cache()
 
 def update_existing_articulo(articulo_id, nro_articulo, descripcion, costo, precio_publico, precio_real, id_rubro):
     fecha_actual = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -380,10 +557,14 @@ def update_existing_articulo(articulo_id, nro_articulo, descripcion, costo, prec
             "rubro_id": id_rubro,
             "fm": fecha_actual
         })
+        # La utilidad de ventas_diarias depende del costo del artículo
+        ventas_diarias.recalcular_articulos(conn, [articulo_id])
+    invalidate_catalog_cache()
 
 def delete_existing_articulo(articulo_id):
     with engine.begin() as conn:
         conn.execute(text("DELETE FROM articulos WHERE id = :id"), {"id": articulo_id})
+    invalidate_catalog_cache()
 
 def check_article_in_remitos(articulo_id):
     with engine.begin() as conn:
@@ -391,115 +572,272 @@ def check_article_in_remitos(articulo_id):
         return count > 0
     
 # --- Nuevas funciones para la carga desde Excel ---
-def update_or_insert_articulos_from_excel(df):
+_IMPORT_COLUMNS = ["nro_articulo", "descripcion", "precio_real"]
+
+def _stage_articulos_import(conn, df, orden_inicial=0):
     """
-    Procesa un DataFrame para actualizar o insertar artículos en la base de datos,
-    evitando registros duplicados por nro_articulo en el archivo de origen.
-    Retorna un diccionario con el número de artículos insertados y actualizados.
+    Copia las filas del DataFrame a la tabla temporal tmp_articulos_import con un único COPY.
+    La columna orden conserva la posición en el archivo (para quedarse con la primera aparición
+    de cada nro_articulo). Retorna la cantidad de filas copiadas.
+    """
+    if df.empty:
+        return 0
+    staging = pd.DataFrame({
+        "orden": range(orden_inicial, orden_inicial + len(df)),
+        "nro_articulo": df["nro_articulo"].astype(str).str.strip().str.upper().to_numpy(),
+        "descripcion": df["descripcion"].to_numpy(),
+        "precio_real": pd.to_numeric(df["precio_real"], errors="coerce").to_numpy(),
+    })
+    buffer = io.StringIO()
+    staging.to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+    with conn.connection.cursor() as cur:
+        cur.copy_expert(
+            "COPY tmp_articulos_import (orden, nro_articulo, descripcion, precio_real) FROM STDIN WITH (FORMAT csv)",
+            buffer
+        )
+    return len(staging)
+
+def update_or_insert_articulos_from_excel(df, progreso=None):
+    """
+    Actualiza o inserta artículos (nro_articulo, descripcion, precio_real) en bloque:
+    las filas se copian a una tabla temporal con COPY y se aplican con un único
+    INSERT ... ON CONFLICT (nro_articulo) DO UPDATE, dentro de una sola transacción.
+    df puede ser un DataFrame o un iterable de DataFrames (lotes leídos en streaming);
+    progreso, si se indica, se llama con la cantidad de filas copiadas tras cada lote.
+    Ante códigos repetidos en el archivo se conserva la primera aparición.
+    Las filas cuya descripción y precio no cambiaron no se tocan (no cambia fecha_mod).
+    Retorna un diccionario con los artículos insertados, actualizados y sin cambios.
     """
-    
-    # Elimina duplicados basándose en la columna 'nro_articulo'.
-    # 'keep="first"' asegura que el primer registro que aparece en el archivo
-    # es el que se mantiene.
-    df = df.drop_duplicates(subset=['nro_articulo'], keep='first')
-    
-    inserted_count = 0
-    updated_count = 0
     fecha_actual = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    lotes = [df] if isinstance(df, pd.DataFrame) else df
 
     with engine.begin() as conn:
-        existing_articles_df = pd.read_sql("SELECT nro_articulo FROM articulos", conn)
-        existing_nros = set(existing_articles_df['nro_articulo'].str.upper())
+        conn.execute(text("""
+            CREATE TEMP TABLE tmp_articulos_import (
+                orden INTEGER NOT NULL,
+                nro_articulo TEXT,
+                descripcion TEXT,
+                precio_real REAL
+            ) ON COMMIT DROP
+        """))
+        copiadas = 0
+        for lote in lotes:
+            copiadas += _stage_articulos_import(conn, lote[_IMPORT_COLUMNS], orden_inicial=copiadas)
+            if progreso:
+                progreso(copiadas)
 
-    articles_to_update = []
-    articles_to_insert = []
+        result = conn.execute(text("""
+            INSERT INTO articulos (nro_articulo, descripcion, precio_real, fecha_alta, fecha_mod, costo, precio_publico)
+            SELECT t.nro_articulo, t.descripcion, t.precio_real, :now, :now, 0.00, 0.00
+            FROM (
+                SELECT DISTINCT ON (nro_articulo)
+                       nro_articulo,
+                       COALESCE(descripcion, '') AS descripcion,
+                       COALESCE(precio_real, 0) AS precio_real
+                FROM tmp_articulos_import
+                WHERE nro_articulo IS NOT NULL AND nro_articulo <> ''
+                ORDER BY nro_articulo, orden
+            ) t
+            ON CONFLICT (nro_articulo) DO UPDATE
+                SET descripcion = EXCLUDED.descripcion,
+                    precio_real = EXCLUDED.precio_real,
+                    fecha_mod = EXCLUDED.fecha_mod
+                WHERE articulos.descripcion IS DISTINCT FROM EXCLUDED.descripcion
+                   OR articulos.precio_real IS DISTINCT FROM EXCLUDED.precio_real
+            RETURNING (xmax = 0) AS insertado
+        """), {"now": fecha_actual}).fetchall()
 
-    for index, row in df.iterrows():
-        nro = str(row['nro_articulo']).strip().upper()
-        desc = row['descripcion']
-        precio = float(row['precio_real']) if pd.notna(row['precio_real']) else 0.0
-        
-        if nro in existing_nros:
-            articles_to_update.append({
-                "nro": nro,
-                "desc": desc,
-                "pr": precio,
-                "fm": fecha_actual
-            })
-        else:
-            articles_to_insert.append({
-                "nro": nro,
-                "desc": desc,
-                "pr": precio,
-                "fa": fecha_actual,
-                "fm": fecha_actual
-            })
+        total = conn.execute(text("""
+            SELECT COUNT(DISTINCT nro_articulo) FROM tmp_articulos_import
+            WHERE nro_articulo IS NOT NULL AND nro_articulo <> ''
+        """)).scalar()
+
+    inserted_count = sum(1 for r in result if r.insertado)
+    updated_count = len(result) - inserted_count
 
+    if result:
+        invalidate_catalog_cache()
+    return {
+        "insertados": inserted_count,
+        "actualizados": updated_count,
+        "sin_cambios": total - len(result)
+    }
+
+def get_precios_articulos(codigos):
+    """Devuelve {nro_articulo: precio_real} de los códigos dados, en una sola consulta."""
     with engine.begin() as conn:
-        # Bulk Update
-        if articles_to_update:
-            conn.execute(text("""
-                UPDATE articulos
-                SET descripcion = :desc,
-                    precio_real = :pr,
-                    fecha_mod = :fm
-                WHERE nro_articulo = :nro
-            """), articles_to_update)
-            updated_count = len(articles_to_update)
-
-        # Bulk Insert
-        if articles_to_insert:
-            conn.execute(text("""
-                INSERT INTO articulos (nro_articulo, descripcion, precio_real, fecha_alta, fecha_mod, costo, precio_publico)
-                VALUES (:nro, :desc, :pr, :fa, :fm, 0.00, 0.00)
-            """), articles_to_insert)
-            inserted_count = len(articles_to_insert)
+        rows = conn.execute(
+            text("SELECT nro_articulo, COALESCE(precio_real, 0) FROM articulos WHERE nro_articulo = ANY(:codigos)"),
+            {"codigos": [str(c) for c in codigos]}
+        ).all()
+    return {nro: float(precio) for nro, precio in rows}
+
+# Cabecera e items de remitos (get_remito_completo y get_remitos_completos); {filtro} es
+# la condición del WHERE
+_REMITO_CABECERA_SQL = """
+    SELECT r.id AS remito_id, r.cliente_id, r.fecha_entrega, r.fecha_retiro, r.observaciones,
+           c.razon_social, c.boca, c.direccion, c.localidad, c.telefono,
+           COALESCE(r.porc_dto, c.porc_dto, 0) AS porc_dto,
+           r.fecha_mod, c.fecha_mod AS cliente_fecha_mod
+    FROM remitos r
+    JOIN clientes c ON r.cliente_id = c.id
+    WHERE {filtro}
+"""
 
-    return {"insertados": inserted_count, "actualizados": updated_count}
+_REMITO_ITEMS_SQL = """
+    SELECT ri.remito_id, a.id AS id_articulo, a.nro_articulo, a.descripcion,
+           COALESCE(a.precio_publico, 0) AS precio_publico,
+           COALESCE(ri.precio_real_item, a.precio_real, 0) AS precio_real, 
+           COALESCE(a.costo, 0) AS costo,
+           ri.entregados, ri.devueltos, COALESCE(ri.observaciones_item, '') AS observaciones
+    FROM remito_items ri
+    JOIN articulos a ON ri.articulo_id = a.id
+    WHERE {filtro}
+    ORDER BY ri.remito_id, ri.id ASC
+"""
 
 def get_remito_completo(remito_id: int):
     """Devuelve un diccionario con datos de cabecera e items de un remito dado."""
     with engine.begin() as conn:
         # --- Cabecera ---
-        cabecera = conn.execute(text("""
-            SELECT r.id AS remito_id, r.cliente_id, r.fecha_entrega, r.fecha_retiro, r.observaciones,
-                   c.razon_social, c.boca, c.direccion, c.localidad, c.telefono,
-                   COALESCE(r.porc_dto, c.porc_dto, 0) AS porc_dto
-            FROM remitos r
-            JOIN clientes c ON r.cliente_id = c.id
-            WHERE r.id = :rid
-        """), {"rid": remito_id}).mappings().first()
+        cabecera = conn.execute(
+            text(_REMITO_CABECERA_SQL.format(filtro="r.id = :rid")), {"rid": remito_id}
+        ).mappings().first()
 
         if not cabecera:
             return None
 
         # --- Items ---
-        items = pd.read_sql(text("""
-            SELECT a.id AS id_articulo, a.nro_articulo, a.descripcion,
-                   COALESCE(a.precio_publico, 0) AS precio_publico,
-                   COALESCE(ri.precio_real_item, a.precio_real, 0) AS precio_real, 
-                   COALESCE(a.costo, 0) AS costo,
-                   ri.entregados, ri.devueltos, COALESCE(ri.observaciones_item, '') AS observaciones
-            FROM remito_items ri
-            JOIN articulos a ON ri.articulo_id = a.id
-            WHERE ri.remito_id = :rid
-            ORDER BY ri.id ASC
-        """), conn, params={"rid": remito_id})
+        items = pd.read_sql(text(_REMITO_ITEMS_SQL.format(filtro="ri.remito_id = :rid")), conn,
+                            params={"rid": remito_id})
 
     return {
         "cabecera": dict(cabecera),
-        "items": items
+        "items": items.drop(columns="remito_id")
     }
 
+def get_remitos_completos(remito_ids=None, desde=None, hasta=None, cliente_id=None):
+    """
+    Como get_remito_completo, pero para muchos remitos con dos consultas (cabeceras e items).
+    Filtra por lista de ids, rango de fecha de entrega y/o cliente (los None no filtran).
+    Devuelve {remito_id: {"cabecera", "items"}} en orden de remito.
+    """
+    condiciones = ["TRUE"]
+    params = {}
+    if remito_ids is not None:
+        condiciones.append("r.id = ANY(:ids)")
+        params["ids"] = [int(i) for i in remito_ids]
+    if desde is not None:
+        condiciones.append("r.fecha_entrega >= :desde")
+        params["desde"] = desde
+    if hasta is not None:
+        condiciones.append("r.fecha_entrega <= :hasta")
+        params["hasta"] = hasta
+    if cliente_id is not None:
+        condiciones.append("r.cliente_id = :cid")
+        params["cid"] = int(cliente_id)
+
+    with engine.begin() as conn:
+        cabeceras = conn.execute(
+            text(_REMITO_CABECERA_SQL.format(filtro=" AND ".join(condiciones)) + " ORDER BY r.id"), params
+        ).mappings().all()
+        ids = [c["remito_id"] for c in cabeceras]
+        items = pd.read_sql(text(_REMITO_ITEMS_SQL.format(filtro="ri.remito_id = ANY(:ids)")), conn,
+                            params={"ids": ids})
+
+    por_remito = {rid: grupo for rid, grupo in items.groupby("remito_id", sort=False)}
+    vacio = items.iloc[0:0].drop(columns="remito_id")
+    return {
+        c["remito_id"]: {
+            "cabecera": dict(c),
+            "items": (por_remito[c["remito_id"]].drop(columns="remito_id").reset_index(drop=True)
+                      if c["remito_id"] in por_remito else vacio.copy()),
+        }
+        for c in cabeceras
+    }
+
+# Snapshots de remitos (resultado de get_remito_completo) cacheados por
+# (remito_id, fecha_mod del remito, fecha_mod del cliente).
+_REMITO_CACHE_MAX = 256
+_remito_cache_lock = threading.Lock()
+_remito_cache = OrderedDict()
+
+def _copy_snapshot(snapshot):
+    """Copia superficial para que las páginas puedan modificar cabecera/items sin tocar el caché."""
+    return {"cabecera": dict(snapshot["cabecera"]), "items": snapshot["items"].copy()}
+
+def get_remito_snapshot(remito_id: int):
+    """
+    Igual que get_remito_completo, pero reutiliza el último snapshot leído del remito
+    mientras no cambie su fecha_mod (ni la del cliente). Validarlo cuesta una consulta
+    de una fila; la lectura completa solo se hace cuando el remito cambió.
+    Devuelve None si el remito no existe.
+    """
+    remito_id = int(remito_id)
+    with engine.begin() as conn:
+        version = conn.execute(text("""
+            SELECT r.fecha_mod, c.fecha_mod
+            FROM remitos r
+            JOIN clientes c ON r.cliente_id = c.id
+            WHERE r.id = :rid
+        """), {"rid": remito_id}).first()
+
+    if version is None:
+        invalidate_remito_snapshot(remito_id)
+        return None
+
+    key = (remito_id, version[0], version[1])
+    with _remito_cache_lock:
+        cached = _remito_cache.get(remito_id)
+        if cached is not None and cached[0] == key:
+            _remito_cache.move_to_end(remito_id)
+            return _copy_snapshot(cached[1])
+
+    snapshot = get_remito_completo(remito_id)
+    if snapshot is None:
+        return None
+
+    key = (remito_id, snapshot["cabecera"]["fecha_mod"], snapshot["cabecera"]["cliente_fecha_mod"])
+    with _remito_cache_lock:
+        _remito_cache[remito_id] = (key, snapshot)
+        _remito_cache.move_to_end(remito_id)
+        while len(_remito_cache) > _REMITO_CACHE_MAX:
+            _remito_cache.popitem(last=False)
+    return _copy_snapshot(snapshot)
+
+def invalidate_remito_snapshot(remito_id=None):
+    """Descarta el snapshot cacheado de un remito (o de todos si remito_id es None)."""
+    with _remito_cache_lock:
+        if remito_id is None:
+            _remito_cache.clear()
+        else:
+            _remito_cache.pop(int(remito_id), None)
+
+def _clean_observaciones(valor):
+    """Normaliza observaciones vacías o 'None' a NULL."""
+    if pd.notna(valor) and str(valor).strip() and str(valor).strip().lower() != "none":
+        return str(valor).strip()
+    return None
+
 def update_remito_completo(remito_id, fecha_retiro, observaciones_cabecera, items_df):
     """
     Actualiza completamente la cabecera (fecha_retiro, observaciones) y los items de un remito existente.
+    Solo se escriben los items que cambiaron respecto de lo grabado.
     """
     remito_id = int(remito_id)
     fecha_actual = datetime.now()
-    precios_modificados = False
+
+    rows = [{
+        "articulo_id": int(rec["id_articulo"]),
+        "entregados": int(rec["Entregados"]),
+        "observaciones": _clean_observaciones(rec["Observaciones"]),
+        "precio_real": float(rec["Precio Real"])
+    } for rec in items_df.to_dict("records")]
 
     with engine.begin() as conn:
+        anterior = _bloquear_remito(conn, remito_id)
+
         # Actualizar la cabecera del remito
         conn.execute(text("""
             UPDATE remitos
@@ -512,46 +850,16 @@ def update_remito_completo(remito_id, fecha_retiro, observaciones_cabecera, item
             "rid": remito_id
         })
 
-        # Eliminar items antiguos del remito
-        conn.execute(text("""
-            DELETE FROM remito_items WHERE remito_id = :rid
-        """), {"rid": remito_id})
+        # Actualizar precios maestros si sufrieron modificaciones y sincronizar items
+        precios_modificados = _sync_precios_articulos(conn, rows, fecha_actual)
+        _apply_remito_items_diff(conn, remito_id, rows)
 
-        # Reinsertar los nuevos items y actualizar precios maestros si sufrieron modificaciones
-        for _, row in items_df.iterrows():
-            articulo_id = int(row['id_articulo'])
-            precio_real_val = float(row['Precio Real'])
-            entregados_val = int(row['Entregados'])
-            observaciones_val = str(row['Observaciones']).strip() if pd.notna(row['Observaciones']) and str(row['Observaciones']).strip() and str(row['Observaciones']).strip().lower() != 'none' else None
-
-            # Verificar si el precio en el maestro cambió
-            current_price_result = conn.execute(text("SELECT precio_real FROM articulos WHERE id = :aid"), 
-                                                 {"aid": articulo_id}).scalar()
-            
-            if current_price_result is not None and float(current_price_result) != precio_real_val:
-                conn.execute(text("""
-                    UPDATE articulos
-                    SET precio_real = :new_price, fecha_mod = :now
-                    WHERE id = :aid
-                """), {
-                    "new_price": precio_real_val,
-                    "now": fecha_actual,
-                    "aid": articulo_id
-                })
-                precios_modificados = True
-
-            # Insertar item
-            conn.execute(text("""
-                INSERT INTO remito_items (remito_id, articulo_id, entregados, observaciones_item, precio_real_item)
-                VALUES (:rid, :aid, :entregados, :obs, :precio_real)
-            """), {
-                "rid": remito_id,
-                "aid": articulo_id,
-                "entregados": entregados_val,
-                "obs": observaciones_val,
-                "precio_real": precio_real_val
-            })
+        if anterior is not None:
+            ventas_diarias.recalcular_remito(conn, anterior.cliente_id, [anterior.fecha_retiro, fecha_retiro])
 
+    invalidate_remito_snapshot(remito_id)
+    if precios_modificados:
+        invalidate_catalog_cache()
     return remito_id, precios_modificados
 
 def get_all_clientes():
@@ -588,6 +896,7 @@ def save_new_cliente(razon_social, boca, direccion, localidad, telefono, email,
             "pd": porc_dto,
             "vid": vendedor_id
         })
+    invalidate_catalog_cache()
 
 def update_existing_cliente(cliente_id, razon_social, boca, direccion, localidad, telefono, email, porc_dto, vendedor_id):
     """Actualiza un cliente existente en la base de datos."""
@@ -615,11 +924,15 @@ def update_existing_cliente(cliente_id, razon_social, boca, direccion, localidad
             "pd": porc_dto,
             "vid": vendedor_id
         })
+        # Los remitos sin descuento propio usan el del cliente
+        ventas_diarias.recalcular_cliente(conn, cliente_id)
+    invalidate_catalog_cache()
 
 def delete_existing_cliente(cliente_id):
     """Elimina un cliente existente de la base de datos."""
     with engine.begin() as conn:
         conn.execute(text("DELETE FROM clientes WHERE id = :id;"), {"id": cliente_id})
+    invalidate_catalog_cache()
 
 def check_client_in_remitos(cliente_id):
     """Verifica si un cliente está asociado a algún remito."""
@@ -633,6 +946,8 @@ def update_remito_data(remito_id, fecha_retiro, observaciones_cabecera, items_df
     """
     remito_id = int(remito_id)
     with engine.begin() as conn:
+        anterior = _bloquear_remito(conn, remito_id)
+
         # Actualizar la cabecera del remito
         if fecha_entrega is not None:
             conn.execute(text("""
@@ -656,49 +971,42 @@ def update_remito_data(remito_id, fecha_retiro, observaciones_cabecera, items_df
                 "rid": remito_id
             })
 
-        # Verificar si la tabla remito_items tiene la columna 'devueltos'
-        # Si no existe, agregarla
-        # try:
-        #    conn.execute(text("ALTER TABLE remito_items ADD COLUMN IF NOT EXISTS devueltos INTEGER DEFAULT 0"))
-        # except Exception:
-        #    pass  # La columna ya existe o hay otro error que podemos ignorar
-
-        # Eliminar items antiguos de este remito para sincronizar altas y bajas
-        conn.execute(text("""
-            DELETE FROM remito_items WHERE remito_id = :rid
-        """), {"rid": remito_id})
+        # Resolver en una sola consulta los artículos que llegan sin id_articulo
+        records = items_df.to_dict("records")
+        nros_sin_id = list({
+            str(rec["nro_articulo"]) for rec in records
+            if not pd.notna(rec.get("id_articulo"))
+        })
+        ids_por_nro = {}
+        if nros_sin_id:
+            ids_por_nro = dict(conn.execute(text("""
+                SELECT nro_articulo, id FROM articulos WHERE nro_articulo = ANY(:nros)
+            """), {"nros": nros_sin_id}).fetchall())
 
-        # Reinsertar los ítems actualizados del remito
-        for _, row in items_df.iterrows():
-            articulo_id = None
-            if "id_articulo" in row and pd.notna(row["id_articulo"]):
-                articulo_id = int(row["id_articulo"])
+        rows = []
+        for rec in records:
+            if pd.notna(rec.get("id_articulo")):
+                articulo_id = int(rec["id_articulo"])
             else:
-                articulo_result = conn.execute(text("""
-                    SELECT id FROM articulos WHERE nro_articulo = :nro
-                """), {"nro": str(row["nro_articulo"])}).scalar()
-                if articulo_result:
-                    articulo_id = int(articulo_result)
-            
+                articulo_id = ids_por_nro.get(str(rec["nro_articulo"]))
+
             if articulo_id:
-                devueltos = int(row.get("devueltos", 0)) if pd.notna(row.get("devueltos")) else 0
-                entregados = int(row.get("entregados", 0)) if pd.notna(row.get("entregados")) else 0
-                precio_real = float(row.get("precio_real", 0)) if pd.notna(row.get("precio_real")) else 0.0
-                obs_raw = row.get("observaciones", "")
-                observaciones = str(obs_raw).strip() if (pd.notna(obs_raw) and str(obs_raw).strip() and str(obs_raw).strip().lower() != "none") else None
-                
-                conn.execute(text("""
-                    INSERT INTO remito_items (remito_id, articulo_id, entregados, devueltos, observaciones_item, precio_real_item)
-                    VALUES (:rid, :aid, :entregados, :devueltos, :obs, :precio_real)
-                """), {
-                    "rid": remito_id,
-                    "aid": articulo_id,
-                    "entregados": entregados,
-                    "devueltos": devueltos,
-                    "obs": observaciones,
-                    "precio_real": precio_real
+                rows.append({
+                    "articulo_id": int(articulo_id),
+                    "entregados": int(rec.get("entregados", 0)) if pd.notna(rec.get("entregados")) else 0,
+                    "devueltos": int(rec.get("devueltos", 0)) if pd.notna(rec.get("devueltos")) else 0,
+                    "observaciones": _clean_observaciones(rec.get("observaciones", "")),
+                    "precio_real": float(rec.get("precio_real", 0)) if pd.notna(rec.get("precio_real")) else 0.0
                 })
 
+        # Escribir solo las altas, bajas y modificaciones de items
+        _apply_remito_items_diff(conn, remito_id, rows)
+
+        # Cierre, reapertura o cambio de fecha de retiro: recalcular ambas fechas
+        if anterior is not None:
+            ventas_diarias.recalcular_remito(conn, anterior.cliente_id, [anterior.fecha_retiro, fecha_retiro])
+
+    invalidate_remito_snapshot(remito_id)
 
 def delete_remito(remito_id):
     """
@@ -706,12 +1014,10 @@ def delete_remito(remito_id):
     Retorna True si se eliminó correctamente, False si no se encontró el remito.
     """
     with engine.begin() as conn:
-        # Verificar si el remito existe
-        exists = conn.execute(text("""
-            SELECT COUNT(*) FROM remitos WHERE id = :rid
-        """), {"rid": remito_id}).scalar()
-        
-        if exists == 0:
+        # Verificar si el remito existe (y bloquearlo hasta el final de la transacción)
+        anterior = _bloquear_remito(conn, remito_id)
+
+        if anterior is None:
             return False
         
         # Eliminar primero los items (por la foreign key)
@@ -723,5 +1029,8 @@ def delete_remito(remito_id):
         conn.execute(text("""
             DELETE FROM remitos WHERE id = :rid
         """), {"rid": remito_id})
-        
-        return True
\ No newline at end of file
+
+        ventas_diarias.recalcular_remito(conn, anterior.cliente_id, [anterior.fecha_retiro])
+
+    invalidate_remito_snapshot(remito_id)
+    return True
\ No newline at end of file
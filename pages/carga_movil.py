@@ -6,9 +6,7 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import models
-if 'dbinitialized' not in st.session_state:
-    models.init_db()
-    st.session_state.dbinitialized = True
+models.ensure_db_initialized()
 
 st.query_params["page"] = "carga_movil"
 
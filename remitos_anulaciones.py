@@ -3,7 +3,7 @@ import streamlit as st
 import streamlit.components.v1 as components
 import pandas as pd
 from datetime import date, datetime
-from models import get_remito_completo, delete_remito
+from models import get_remito_snapshot, delete_remito
 import config
 import time
 
@@ -66,7 +66,7 @@ def remitos_anulaciones():
     def cargar_remito_auto():
         if "input_remito_anul" in st.session_state:
             remito_id = st.session_state["input_remito_anul"]
-            datos = get_remito_completo(remito_id)
+            datos = get_remito_snapshot(remito_id)
             if datos:
                 items = datos["cabecera"]
                 items_df = datos["items"].copy()
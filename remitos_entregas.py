@@ -5,10 +5,11 @@ from datetime import timedelta, datetime, date
 import time
 import config
 from models import (
-    get_clients_and_articles,
-    save_remito
+    get_catalog,
+    save_remito,
+    get_remito_snapshot
 )
-from gen_remito import gen_remito, process_generate_remito, is_local_app, get_remito_filename
+from gen_remito import gen_remito, process_generate_remito, is_local_app, get_remito_filename, REMITO_FORMATOS
 
 def clear_item_inputs():
     """Reinicia los valores de los inputs de items manteniendo la clave del selectbox."""
@@ -72,10 +73,11 @@ def remitos_entregas():
     st.title(config.TITULO_APP)
     st.header("Carga de Remitos - Entregas")
 
-    if not "clientes_df" in st.session_state or not "articulos_df" in st.session_state:
-        st.session_state.clientes_df, st.session_state.articulos_df = get_clients_and_articles()
+    if not "clientes_df" in st.session_state or not "articulos_df" in st.session_state or not "catalogo_idx" in st.session_state:
+        st.session_state.clientes_df, st.session_state.articulos_df, st.session_state.catalogo_idx = get_catalog()
         # Paso la columna boca a integros
         st.session_state.clientes_df['boca'] = st.session_state.clientes_df['boca'].astype('Int64')
+    catalogo_idx = st.session_state.catalogo_idx
     
     SENTINEL = "— Seleccione un artículo —"
 
@@ -134,13 +136,8 @@ def remitos_entregas():
     # === SECCIÓN CABECERA ===
     st.subheader("Datos del Cliente")
 
-    # Preparar opciones del cliente
-    st.session_state.clientes_df['display_name'] = st.session_state.clientes_df.apply(
-        lambda row: f"{row['razon_social']}  |  Boca: {row['boca']}" if pd.notna(row['boca']) else row['razon_social'],
-        axis=1
-    )
-
-    options_list = st.session_state.clientes_df['display_name'].tolist()
+    # Opciones del cliente (precalculadas en el índice del catálogo)
+    options_list = catalogo_idx.opciones_clientes
     
     # Determinar el index predeterminado si ya hay un cliente seleccionado guardado
     default_client_index = None
@@ -159,16 +156,8 @@ def remitos_entregas():
 
     # Manejar selección del cliente de forma directa
     if cliente_selection:
-        matching_client = st.session_state.clientes_df.loc[st.session_state.clientes_df['display_name'] == cliente_selection]
-        if matching_client.empty:
-            # Fallback a buscar por razón social si por alguna extraña razón no coincide display_name
-            selected_razon_social = cliente_selection.split("  |  Boca:")[0].strip()
-            matching_client = st.session_state.clientes_df.loc[
-                st.session_state.clientes_df['razon_social'].str.strip() == selected_razon_social
-            ]
-
-        if not matching_client.empty:
-            client_data = matching_client.iloc[0]
+        client_data = catalogo_idx.cliente_por_opcion(cliente_selection)
+        if client_data is not None:
             st.session_state.porc_dto = client_data["porc_dto"]
             st.session_state.cabecera_data['cliente_id'] = client_data['id']
             st.session_state.cliente_selected_display = cliente_selection
@@ -228,10 +217,8 @@ def remitos_entregas():
         unsafe_allow_html=True
     )
 
-    # Preparar opciones de artículos
-    articulo_options_full = st.session_state.articulos_df.apply(
-        lambda row: f"{row['nro_articulo']} - {row['descripcion']}", axis=1
-    ).tolist()
+    # Opciones de artículos (precalculadas en el índice del catálogo)
+    articulo_options_full = catalogo_idx.opciones_articulos
 
     # Determinar el label dinámico para el selectbox de artículos
     articulo_label = "Artículo:"
@@ -244,6 +231,12 @@ def remitos_entregas():
         if pending_val:
             st.session_state["articulo_selectbox_fixed"] = pending_val
 
+    curr_sel = st.session_state.get("articulo_selectbox_fixed")
+    articulo_elegido = catalogo_idx.articulo_por_opcion(curr_sel) if curr_sel else None
+    if curr_sel and articulo_elegido is None:
+        # Opción de una versión anterior del catálogo compartido: sin artículo seleccionado
+        st.session_state.articulo_selectbox_fixed = None
+
     # Selectbox de artículo
     articulo_sel_full = st.selectbox(
         articulo_label,
@@ -258,7 +251,7 @@ def remitos_entregas():
     # Manejar selección de artículo
     articulo_sel = None
     if articulo_sel_full and not st.session_state.is_form_disabled:
-        articulo_sel = articulo_sel_full.split(" - ")[0]
+        articulo_sel = articulo_elegido["nro_articulo"]
         
         # Verificar si necesitamos precargar datos O si el precio está en cero (siempre recargar si es cero)
         should_preload = (
@@ -281,17 +274,14 @@ def remitos_entregas():
                 st.session_state.precio_original_articulo = float(row['Precio Real'])
             else:
                 # Cargar precio desde maestro de artículos
-                matching_articulo = st.session_state.articulos_df.loc[
-                    st.session_state.articulos_df['nro_articulo'] == articulo_sel
-                ]
-                if not matching_articulo.empty:
-                    articulo_data = matching_articulo.iloc[0]
+                articulo_data = catalogo_idx.articulo_por_nro(articulo_sel)
+                if articulo_data is not None:
                     precio_maestro = float(articulo_data['precio_real'])
                     st.session_state.precio_real_input = precio_maestro
                     st.session_state.precio_original_articulo = precio_maestro
                     st.session_state.entregados_input = 1
                     st.session_state.observaciones_item_input = ""
-                    st.session_state["pending_articulo_selectbox_fixed"] = f"{articulo_data['nro_articulo']} - {articulo_data['descripcion']}"
+                    st.session_state["pending_articulo_selectbox_fixed"] = catalogo_idx.opcion_de_nro(articulo_sel)
                 else:
                     st.error(f"Error: No se encontró el artículo {articulo_sel}")
                     st.session_state.precio_real_input = 0.0
@@ -362,7 +352,7 @@ def remitos_entregas():
 
     # Procesar acciones de items
     if add_clicked:
-        articulo_info = st.session_state.articulos_df[st.session_state.articulos_df['nro_articulo'] == articulo_sel].iloc[0]
+        articulo_info = catalogo_idx.articulo_por_nro(articulo_sel)
         costo_val = float(articulo_info['costo']) if ('costo' in articulo_info and pd.notna(articulo_info['costo'])) else 0.0
         p_neto = st.session_state.precio_real_input * (1.0 - (porc_dto_val / 100.0))
 
@@ -394,7 +384,7 @@ def remitos_entregas():
             st.rerun()
 
     if mod_clicked and articulo_existe:
-        articulo_info = st.session_state.articulos_df[st.session_state.articulos_df['nro_articulo'] == articulo_sel].iloc[0]
+        articulo_info = catalogo_idx.articulo_por_nro(articulo_sel)
         costo_val = float(articulo_info['costo']) if ('costo' in articulo_info and pd.notna(articulo_info['costo'])) else 0.0
         p_neto = st.session_state.precio_real_input * (1.0 - (porc_dto_val / 100.0))
 
@@ -478,15 +468,13 @@ def remitos_entregas():
 
     # Verificar si hay algún ítem con precio real que no deje utilidad
     has_item_price_error = False
-    if not st.session_state.items_data.empty and 'articulos_df' in st.session_state:
+    if not st.session_state.items_data.empty:
         porc_dto_val = float(st.session_state.get('porc_dto', 0) or 0)
-        for _, row in st.session_state.items_data.iterrows():
-            art_num = row['Articulo']
-            p_real = float(row['Precio Real'])
-            p_neto = p_real * (1.0 - (porc_dto_val / 100.0))
-            matching_art = st.session_state.articulos_df[st.session_state.articulos_df['nro_articulo'] == art_num]
-            if not matching_art.empty:
-                costo_val = float(matching_art.iloc[0]['costo']) if ('costo' in matching_art.iloc[0] and pd.notna(matching_art.iloc[0]['costo'])) else 0.0
+        for art_num, p_real in zip(st.session_state.items_data['Articulo'], st.session_state.items_data['Precio Real']):
+            p_neto = float(p_real) * (1.0 - (porc_dto_val / 100.0))
+            matching_art = catalogo_idx.articulo_por_nro(art_num)
+            if matching_art is not None:
+                costo_val = float(matching_art['costo']) if pd.notna(matching_art['costo']) else 0.0
                 if p_neto < costo_val and costo_val > 0:
                     has_item_price_error = True
                     break
@@ -538,11 +526,14 @@ def remitos_entregas():
 
     # Botón Generar Remito
     with col_buttons[2]:
+        formato = st.radio("Formato del remito", list(REMITO_FORMATOS), format_func=lambda f: REMITO_FORMATOS[f][0],
+                           horizontal=True, key="remito_formato", label_visibility="collapsed")
+        nombre_formato, mime_formato = REMITO_FORMATOS[formato]
         if is_remito_saved:
             if is_local_app():
-                if st.button(f"Generar Remito en Excel #{st.session_state.remito_id}", width="stretch", key=f"btn_gen_{st.session_state.remito_id}"):
+                if st.button(f"Generar Remito en {nombre_formato} #{st.session_state.remito_id}", width="stretch", key=f"btn_gen_{st.session_state.remito_id}"):
                     last_folder = st.session_state.get('last_used_folder')
-                    success, msg, chosen_folder = process_generate_remito(st.session_state.remito_id, is_retiro=False, default_dir=last_folder)
+                    success, msg, chosen_folder = process_generate_remito(st.session_state.remito_id, is_retiro=False, default_dir=last_folder, formato=formato)
                     if success:
                         st.session_state.last_used_folder = chosen_folder
                         st.session_state.remito_generado_msg = f"📁 Remito #{st.session_state.remito_id} guardado exitosamente en: **{msg}**"
@@ -552,16 +543,17 @@ def remitos_entregas():
                         st.info(msg)
                     st.rerun()
             else:
-                excel_buffer = gen_remito(st.session_state.remito_id, is_retiro=False)
+                snapshot = get_remito_snapshot(st.session_state.remito_id)
+                excel_buffer = gen_remito(st.session_state.remito_id, is_retiro=False, snapshot=snapshot, formato=formato)
                 st.download_button(
-                    label=f"Generar Remito en Excel #{st.session_state.remito_id}",
+                    label=f"Generar Remito en {nombre_formato} #{st.session_state.remito_id}",
                     width="stretch",
                     data=excel_buffer,
-                    file_name=get_remito_filename(st.session_state.remito_id, is_retiro=False),
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                    file_name=get_remito_filename(st.session_state.remito_id, is_retiro=False, snapshot=snapshot, formato=formato),
+                    mime=mime_formato
                 )
         else:
-            st.button("Generar Remito en Excel", width="stretch", disabled=True)
+            st.button(f"Generar Remito en {nombre_formato}", width="stretch", disabled=True)
 
     if say_error:
         st.error("Por favor, seleccione un cliente y agregue al menos un item.")
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+import io
+import re
+from datetime import date
+import streamlit as st
+from models import get_remitos_completos, get_all_clientes
+from gen_remito import gen_remitos_zip, gen_remitos_pdf
+import config
+
+# Salidas del lote: nombre -> (formato de cada remito, o None para un único PDF)
+LOTE_SALIDAS = {
+    "Excel (ZIP)": "xlsx",
+    "PDF (ZIP)": "pdf",
+    "PDF único para imprimir": None,
+}
+
+def _parse_ids(texto):
+    """Números de remito escritos separados por comas, espacios o líneas; acepta rangos 10-20."""
+    ids = []
+    for desde, hasta in re.findall(r'(\d+)(?:\s*-\s*(\d+))?', texto or ""):
+        if hasta:
+            ids.extend(range(int(desde), int(hasta) + 1))
+        else:
+            ids.append(int(desde))
+    return sorted(set(ids))
+
+def remitos_lote():
+    st.title(config.TITULO_APP)
+    st.header("Generación de Remitos por Lote")
+    st.markdown("`Genera el Excel o el PDF de todos los remitos elegidos en un único ZIP, o todos en un PDF para imprimir.`")
+
+    modo = st.radio("Seleccionar remitos por:", ["Fecha de entrega", "Cliente", "Números de remito"], horizontal=True)
+
+    filtros = {}
+    nombre_zip = f"Remitos_{date.today():%Y%m%d}"
+    if modo == "Fecha de entrega":
+        col1, col2 = st.columns(2)
+        with col1:
+            desde = st.date_input("Desde", value=date.today(), format="DD/MM/YYYY")
+        with col2:
+            hasta = st.date_input("Hasta", value=date.today(), format="DD/MM/YYYY")
+        filtros = {"desde": desde, "hasta": hasta}
+        nombre_zip = f"Remitos_{desde:%Y%m%d}_{hasta:%Y%m%d}"
+    elif modo == "Cliente":
+        clientes = get_all_clientes()
+        opciones = {
+            int(cid): f"{int(boca):04d} - {razon}"
+            for cid, boca, razon in zip(clientes["id"], clientes["boca"].fillna(0), clientes["razon_social"])
+        }
+        cliente_id = st.selectbox("Cliente", list(opciones), format_func=opciones.get)
+        filtros = {"cliente_id": cliente_id}
+        nombre_zip = f"Remitos_cliente_{cliente_id}"
+    else:
+        texto = st.text_area("Números de remito", placeholder="Ej.: 120, 121, 130-145")
+        filtros = {"remito_ids": _parse_ids(texto)}
+
+    is_retiro = st.checkbox("Remitos de retiro (con devueltos y vendidos)")
+    if is_retiro:
+        nombre_zip += "_Ventas"
+    salida = st.radio("Formato", list(LOTE_SALIDAS), horizontal=True)
+    formato = LOTE_SALIDAS[salida]
+
+    if st.button("📦 Generar remitos", type="primary", width="stretch"):
+        st.session_state.pop("remitos_lote_result", None)
+        if not any(v is not None and v != [] for v in filtros.values()):
+            st.warning("⚠️ Ingrese al menos un número de remito o elija un cliente")
+            return
+
+        progress = st.progress(0)
+        status = st.empty()
+        status.text("🔍 Leyendo remitos...")
+        snapshots = get_remitos_completos(**filtros)
+        if not snapshots:
+            progress.empty()
+            status.empty()
+            st.warning("⚠️ No hay remitos para los filtros elegidos")
+            return
+
+        def on_progress(hechos, total):
+            status.text(f"📄 Generando remitos... {hechos}/{total}")
+            progress.progress(hechos / total)
+
+        output = io.BytesIO()
+        if formato:
+            generados, errores = gen_remitos_zip(output, snapshots, is_retiro=is_retiro, on_progress=on_progress, formato=formato)
+            filename, mime = f"{nombre_zip}.zip", "application/zip"
+        else:
+            generados, errores = gen_remitos_pdf(output, snapshots, is_retiro=is_retiro, on_progress=on_progress)
+            filename, mime = f"{nombre_zip}.pdf", "application/pdf"
+        progress.progress(1.0)
+        status.text("✅ Remitos generados")
+
+        st.session_state.remitos_lote_result = {
+            "data": output.getvalue(),
+            "filename": filename,
+            "mime": mime,
+            "generados": generados,
+            "errores": errores,
+        }
+
+    resultado = st.session_state.get("remitos_lote_result")
+    if resultado:
+        st.success(f"✅ {resultado['generados']} remito(s) en {resultado['filename']}")
+        if resultado["errores"]:
+            with st.expander(f"⚠️ {len(resultado['errores'])} remito(s) no se pudieron generar"):
+                for remito_id, error in resultado["errores"]:
+                    st.markdown(f"- Remito **{remito_id}**: {error}")
+        if resultado["generados"]:
+            st.download_button(
+                label=f"📥 Descargar {resultado['filename']}",
+                width="stretch",
+                data=resultado["data"],
+                file_name=resultado["filename"],
+                mime=resultado["mime"]
+            )
+
+    st.markdown(f"`{config.FOOTER_APP}`")
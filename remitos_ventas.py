@@ -2,7 +2,7 @@ import streamlit as st
 import streamlit.components.v1 as components
 import pandas as pd
 from datetime import date, datetime
-from models import get_remito_completo, update_remito_data, get_clients_and_articles
+from models import get_remito_snapshot, update_remito_data, get_catalog
 
 def clear_item_inputs_rec(set_focus=False, remito_id=None):
     """Reinicia los valores de los inputs de items para recepciones."""
@@ -25,7 +25,7 @@ def clear_item_inputs_rec(set_focus=False, remito_id=None):
         st.session_state.focus_target = "articulo"
     else:
         st.session_state.pop("focus_target", None)
-from gen_remito import gen_remito, process_generate_remito, is_local_app, get_remito_filename
+from gen_remito import gen_remito, process_generate_remito, is_local_app, get_remito_filename, REMITO_FORMATOS
 import numpy as np
 import time
 import config
@@ -80,8 +80,9 @@ def remitos_ventas():
     if "remito_generado_msg" not in st.session_state:
         st.session_state.remito_generado_msg = None
 
-    if "articulos_df" not in st.session_state or "clientes_df" not in st.session_state:
-        st.session_state.clientes_df, st.session_state.articulos_df = get_clients_and_articles()
+    if "articulos_df" not in st.session_state or "clientes_df" not in st.session_state or "catalogo_idx" not in st.session_state:
+        st.session_state.clientes_df, st.session_state.articulos_df, st.session_state.catalogo_idx = get_catalog()
+    catalogo_idx = st.session_state.catalogo_idx
 
     if "entregados_input_rec" not in st.session_state:
         st.session_state.entregados_input_rec = 1
@@ -124,7 +125,7 @@ def remitos_ventas():
     def cargar_remito_auto():
         if "input_remito_rec" in st.session_state:
             remito_id = st.session_state["input_remito_rec"]
-            datos = get_remito_completo(remito_id)
+            datos = get_remito_snapshot(remito_id)
             if datos:
                 items = datos["cabecera"]
                 items_df = datos["items"].copy()
@@ -293,9 +294,7 @@ def remitos_ventas():
                     st.session_state.observaciones_item_input_rec = pending.get("observaciones_item_input_rec", "")
                     st.session_state.articulo_precargado_rec = pending.get("articulo_precargado_rec")
 
-            articulo_options_full = st.session_state.articulos_df.apply(
-                lambda row: f"{row['nro_articulo']} - {row['descripcion']}", axis=1
-            ).tolist()
+            articulo_options_full = catalogo_idx.opciones_articulos
 
             if "pending_articulo_selectbox_rec_val" in st.session_state:
                 pending_val_rec = st.session_state.pop("pending_articulo_selectbox_rec_val")
@@ -303,7 +302,11 @@ def remitos_ventas():
                     st.session_state["articulo_selectbox_rec"] = pending_val_rec
 
             curr_sel = st.session_state.get("articulo_selectbox_rec")
-            articulo_sel_pre = curr_sel.split(" - ")[0] if curr_sel else None
+            articulo_pre = catalogo_idx.articulo_por_opcion(curr_sel) if curr_sel else None
+            if curr_sel and articulo_pre is None:
+                # Opción de una versión anterior del catálogo compartido: sin artículo seleccionado
+                st.session_state.articulo_selectbox_rec = None
+            articulo_sel_pre = articulo_pre["nro_articulo"] if articulo_pre else None
             is_existing_item = False
             if articulo_sel_pre and items_key in st.session_state and not st.session_state[items_key].empty:
                 is_existing_item = articulo_sel_pre in st.session_state[items_key]['nro_articulo'].values
@@ -321,9 +324,7 @@ def remitos_ventas():
                 help="Seleccione un nuevo artículo o uno existente para agregar o eliminar."
             )
 
-            articulo_sel = None
-            if articulo_sel_full:
-                articulo_sel = articulo_sel_full.split(" - ")[0]
+            articulo_sel = articulo_sel_pre if articulo_sel_full else None
 
             if articulo_sel_full and not (st.session_state.is_form_disabled or item_selected_from_grid or not view_grilla_items):
                 should_preload = (
@@ -342,13 +343,12 @@ def remitos_ventas():
                         st.session_state.observaciones_item_input_rec = str(row['observaciones']) if pd.notna(row['observaciones']) else ""
                         st.session_state.precio_real_input_rec = float(row['precio_real'])
                     else:
-                        matching = st.session_state.articulos_df.loc[st.session_state.articulos_df['nro_articulo'] == articulo_sel]
-                        if not matching.empty:
-                            articulo_data = matching.iloc[0]
+                        articulo_data = catalogo_idx.articulo_por_nro(articulo_sel)
+                        if articulo_data is not None:
                             st.session_state.precio_real_input_rec = float(articulo_data['precio_real'])
                             st.session_state.entregados_input_rec = 1
                             st.session_state.observaciones_item_input_rec = ""
-                            st.session_state["pending_articulo_selectbox_rec_val"] = f"{articulo_data['nro_articulo']} - {articulo_data['descripcion']}"
+                            st.session_state["pending_articulo_selectbox_rec_val"] = catalogo_idx.opcion_de_nro(articulo_sel)
                         else:
                             st.session_state.precio_real_input_rec = 0.0
                     st.session_state.focus_target = "entregados"
@@ -437,9 +437,8 @@ def remitos_ventas():
                     st.session_state.item_rec_message = ("error", "⚠️ El precio real debe ser mayor a cero.")
                     st.rerun()
                 else:
-                    matching = st.session_state.articulos_df.loc[st.session_state.articulos_df['nro_articulo'] == articulo_sel]
-                    if not matching.empty:
-                        articulo_info = matching.iloc[0]
+                    articulo_info = catalogo_idx.articulo_por_nro(articulo_sel)
+                    if articulo_info is not None:
                         costo_val = float(articulo_info['costo']) if ('costo' in articulo_info and pd.notna(articulo_info['costo'])) else 0.0
                         porc_dto_val = float(cab.get("porc_dto", 0) or 0)
                         precio_neto_input = st.session_state.precio_real_input_rec * (1.0 - (porc_dto_val / 100.0))
@@ -572,8 +571,7 @@ def remitos_ventas():
                         selected_row = edited_df.loc[idx]
                         nro_art = selected_row["nro_articulo"]
 
-                        matching_opts = [opt for opt in articulo_options_full if opt.startswith(f"{nro_art} - ")]
-                        sel_option = matching_opts[0] if matching_opts else None
+                        sel_option = catalogo_idx.opcion_de_nro(nro_art)
 
                         st.session_state.pending_selected_item_rec = {
                             "articulo_selectbox_rec": sel_option,
@@ -789,15 +787,18 @@ def remitos_ventas():
             # Botón Generar/Actualizar/Sobreescribir Remito en Excel
             with col_buttons[2]:
                 is_retiro_for_excel = not is_recepcion_dia
-                excel_btn_label = f"Sobreescribir Remito Original en Excel #{remito_id}" if is_recepcion_dia else f"Actualizar Remito de Ventas en Excel #{remito_id}"
-                excel_disabled_label = "Sobreescribir Remito Original en Excel" if is_recepcion_dia else "Actualizar Remito de Ventas en Excel"
+                formato = st.radio("Formato del remito", list(REMITO_FORMATOS), format_func=lambda f: REMITO_FORMATOS[f][0],
+                                   horizontal=True, key="remito_formato", label_visibility="collapsed")
+                nombre_formato, mime_formato = REMITO_FORMATOS[formato]
+                excel_btn_label = f"Sobreescribir Remito Original en {nombre_formato} #{remito_id}" if is_recepcion_dia else f"Actualizar Remito de Ventas en {nombre_formato} #{remito_id}"
+                excel_disabled_label = f"Sobreescribir Remito Original en {nombre_formato}" if is_recepcion_dia else f"Actualizar Remito de Ventas en {nombre_formato}"
 
                 if is_remito_saved and not is_excel_saved:
                     try:
                         if is_local_app():
                             if st.button(excel_btn_label, type="primary", width="stretch", key=f"btn_gen_{remito_id}"):
                                 last_folder = st.session_state.get('last_used_folder')
-                                success, msg, chosen_folder = process_generate_remito(remito_id, is_retiro=is_retiro_for_excel, default_dir=last_folder)
+                                success, msg, chosen_folder = process_generate_remito(remito_id, is_retiro=is_retiro_for_excel, default_dir=last_folder, formato=formato)
                                 if success:
                                     st.session_state.last_used_folder = chosen_folder
                                     st.session_state.remito_generado_msg = f"🎉 ¡Remito #{remito_id} guardado exitosamente en: **{msg}**!"
@@ -808,14 +809,15 @@ def remitos_ventas():
                                     st.info(msg)
                                 st.rerun()
                         else:
-                            excel_buffer = gen_remito(remito_id, is_retiro=is_retiro_for_excel)
+                            snapshot = get_remito_snapshot(remito_id)
+                            excel_buffer = gen_remito(remito_id, is_retiro=is_retiro_for_excel, snapshot=snapshot, formato=formato)
                             download_clicked = st.download_button(
                                 label=excel_btn_label,
                                 type="primary",
                                 width="stretch",
                                 data=excel_buffer,
-                                file_name=get_remito_filename(remito_id, is_retiro=is_retiro_for_excel),
-                                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                                file_name=get_remito_filename(remito_id, is_retiro=is_retiro_for_excel, snapshot=snapshot, formato=formato),
+                                mime=mime_formato,
                                 key=f"download_remito_{remito_id}"
                             )
                             if download_clicked:
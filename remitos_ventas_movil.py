@@ -1,7 +1,7 @@
 import streamlit as st
 import pandas as pd
 from datetime import date, datetime
-from models import get_remito_completo, update_remito_data, get_clients_and_articles
+from models import get_remito_snapshot, update_remito_data, get_catalog
 from gen_remito import gen_remito, process_generate_remito, is_local_app, get_remito_filename
 import config
 
@@ -127,8 +127,9 @@ def remitos_ventas_movil():
     if "remito_generado_msg_movil" not in st.session_state:
         st.session_state.remito_generado_msg_movil = None
 
-    if "articulos_df" not in st.session_state or "clientes_df" not in st.session_state:
-        st.session_state.clientes_df, st.session_state.articulos_df = get_clients_and_articles()
+    if "articulos_df" not in st.session_state or "clientes_df" not in st.session_state or "catalogo_idx" not in st.session_state:
+        st.session_state.clientes_df, st.session_state.articulos_df, st.session_state.catalogo_idx = get_catalog()
+    catalogo_idx = st.session_state.catalogo_idx
 
     if "entregados_input_rec_movil" not in st.session_state:
         st.session_state.entregados_input_rec_movil = 1
@@ -161,7 +162,7 @@ def remitos_ventas_movil():
     def cargar_remito_auto_movil():
         if "input_remito_rec_movil" in st.session_state:
             remito_id = st.session_state["input_remito_rec_movil"]
-            datos = get_remito_completo(remito_id)
+            datos = get_remito_snapshot(remito_id)
             if datos:
                 items = datos["cabecera"]
                 items_df = datos["items"].copy()
@@ -328,9 +329,13 @@ def remitos_ventas_movil():
 
             # === Alta de Artículos ===
             st.subheader("Alta de Artículos")
-            articulo_options_full = st.session_state.articulos_df.apply(
-                lambda row: f"{row['nro_articulo']} - {row['descripcion']}", axis=1
-            ).tolist()
+            articulo_options_full = catalogo_idx.opciones_articulos
+
+            curr_sel = st.session_state.get("articulo_selectbox_rec_movil")
+            articulo_elegido = catalogo_idx.articulo_por_opcion(curr_sel) if curr_sel else None
+            if curr_sel and articulo_elegido is None:
+                # Opción de una versión anterior del catálogo compartido: sin artículo seleccionado
+                st.session_state.articulo_selectbox_rec_movil = None
 
             articulo_sel_full = st.selectbox(
                 f"Artículos para {cab['razon_social']}:",
@@ -343,7 +348,7 @@ def remitos_ventas_movil():
 
             articulo_sel = None
             if articulo_sel_full and not st.session_state.is_form_disabled_movil:
-                articulo_sel = articulo_sel_full.split(" - ")[0]
+                articulo_sel = articulo_elegido["nro_articulo"]
 
                 should_preload = (
                     'articulo_precargado_rec_movil' not in st.session_state or
@@ -361,9 +366,8 @@ def remitos_ventas_movil():
                         st.session_state.observaciones_item_input_rec_movil = str(row['observaciones']) if pd.notna(row['observaciones']) else ""
                         st.session_state.precio_real_input_rec_movil = float(row['precio_real'])
                     else:
-                        matching = st.session_state.articulos_df.loc[st.session_state.articulos_df['nro_articulo'] == articulo_sel]
-                        if not matching.empty:
-                            articulo_data = matching.iloc[0]
+                        articulo_data = catalogo_idx.articulo_por_nro(articulo_sel)
+                        if articulo_data is not None:
                             st.session_state.precio_real_input_rec_movil = float(articulo_data['precio_real'])
                             st.session_state.entregados_input_rec_movil = 1
                             st.session_state.observaciones_item_input_rec_movil = ""
@@ -391,9 +395,8 @@ def remitos_ventas_movil():
                 elif st.session_state.precio_real_input_rec_movil <= 0:
                     st.error("⚠️ El precio real debe ser mayor a cero.")
                 else:
-                    matching = st.session_state.articulos_df.loc[st.session_state.articulos_df['nro_articulo'] == articulo_sel]
-                    if not matching.empty:
-                        articulo_info = matching.iloc[0]
+                    articulo_info = catalogo_idx.articulo_por_nro(articulo_sel)
+                    if articulo_info is not None:
                         costo_val = float(articulo_info['costo']) if ('costo' in articulo_info and pd.notna(articulo_info['costo'])) else 0.0
                         precio_neto_input = st.session_state.precio_real_input_rec_movil * (1.0 - (porc_dto_val / 100.0))
                         if precio_neto_input < costo_val:
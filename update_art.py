@@ -5,9 +5,60 @@ import os
 import models # Make sure you have models.py in the same directory
 import config
 
+from openpyxl import load_workbook
+
 # Import new functions from models.py
 from models import update_or_insert_articulos_from_excel
 
+# Los datos de la planilla empiezan en la fila 9 (encabezados en la fila 8)
+FILA_INICIO_DATOS = 9
+TAMANIO_LOTE = 2000
+
+def _limpiar_lote(filas):
+    """Arma el DataFrame de un lote con los mismos criterios de limpieza de la carga original."""
+    df = pd.DataFrame(filas, columns=['nro_articulo', 'descripcion', 'precio_real'])
+    df['nro_articulo'] = df['nro_articulo'].astype(str).str.strip().str.upper()
+    df['precio_real'] = pd.to_numeric(df['precio_real'], errors='coerce').fillna(0)
+    df['descripcion'] = df['descripcion'].fillna('').astype(str).str.strip().str.capitalize()
+    return df
+
+def iter_articulos_xlsm(archivo, tamanio_lote=TAMANIO_LOTE, max_lotes=None):
+    """
+    Lee la primera hoja del .xlsm en modo solo lectura y devuelve lotes (DataFrames) de a lo
+    sumo tamanio_lote filas con nro_articulo, descripcion y precio_real (columnas A a C desde
+    la fila 9). Solo se mantiene en memoria un lote por vez; las filas sin código se omiten.
+    """
+    archivo.seek(0)
+    wb = load_workbook(archivo, read_only=True, data_only=True, keep_vba=False)
+    try:
+        ws = wb.worksheets[0]
+        filas = []
+        lotes = 0
+        for nro, desc, precio in ws.iter_rows(min_row=FILA_INICIO_DATOS, max_col=3, values_only=True):
+            if nro is None or str(nro).strip() == '':
+                continue
+            filas.append((nro, desc, precio))
+            if len(filas) >= tamanio_lote:
+                yield _limpiar_lote(filas)
+                filas = []
+                lotes += 1
+                if max_lotes is not None and lotes >= max_lotes:
+                    return
+        if filas:
+            yield _limpiar_lote(filas)
+    finally:
+        wb.close()
+
+def contar_filas_xlsm(archivo):
+    """Cantidad aproximada de filas de datos según la dimensión declarada en la hoja (o None)."""
+    archivo.seek(0)
+    wb = load_workbook(archivo, read_only=True, data_only=True, keep_vba=False)
+    try:
+        max_row = wb.worksheets[0].max_row
+    finally:
+        wb.close()
+    return max(max_row - FILA_INICIO_DATOS + 1, 0) if max_row else None
+
 def update_art():
     st.title(config.TITULO_APP)
     st.header("Actualización del Maestro de Artículos")
@@ -26,20 +77,10 @@ def update_art():
 
     if uploaded_file is not None:
         try:
-            # Lee el archivo directamente en un DataFrame sin guardarlo
-            # header=7 indica que los encabezados están en la 8ª fila (índice 7),
-            # y los datos comienzan en la fila 9 (8ª fila de datos).
-            df_raw = pd.read_excel(uploaded_file, header=7)
-            
-            # Selecciona las 3 primeras columnas (nro_articulo, descripcion, precio_real)
-            df = df_raw.iloc[:, 0:3].copy()
-            df.columns = ['nro_articulo', 'descripcion', 'precio_real']
-
-            # Limpia y procesa los datos
-            df['nro_articulo'] = df['nro_articulo'].astype(str).str.strip().str.upper()
-            df = df.dropna(subset=['nro_articulo'])
-            df['precio_real'] = pd.to_numeric(df['precio_real'], errors='coerce').fillna(0)
-            df['descripcion'] = df['descripcion'].astype(str).str.strip().str.capitalize()
+            # Vista previa: solo se lee el primer lote de la planilla (modo solo lectura)
+            df = next(iter_articulos_xlsm(uploaded_file, tamanio_lote=10, max_lotes=1), None)
+            if df is None:
+                df = _limpiar_lote([])
 
             st.subheader("Vista previa del archivo de actualización")
 
@@ -61,10 +102,20 @@ def update_art():
             # Botón para confirmar la carga a la base de datos
             if st.button("Cargar datos al Maestro de Artículos", type="primary"):
                 with st.spinner('Cargando datos (puede demorar algún minuto)...'):
-                    # Llama a la función que maneja la lógica de la base de datos
-                    stats = update_or_insert_articulos_from_excel(df)
+                    total_filas = contar_filas_xlsm(uploaded_file)
+                    barra = st.progress(0, text="Leyendo planilla...")
+
+                    def mostrar_progreso(filas_leidas):
+                        if total_filas:
+                            barra.progress(min(filas_leidas / total_filas, 1.0), text=f"Filas leídas: {filas_leidas:,} de ~{total_filas:,}")
+                        else:
+                            barra.progress(0, text=f"Filas leídas: {filas_leidas:,}")
+
+                    # Los lotes se leen y se copian a la base de a uno (memoria acotada)
+                    stats = update_or_insert_articulos_from_excel(iter_articulos_xlsm(uploaded_file), progreso=mostrar_progreso)
+                    barra.progress(1.0, text="Lectura completa")
                     st.success(f"¡Carga finalizada!")
-                    st.write(f"  Artículos insertados: **{stats['insertados']}**  |  Artículos actualizados: **{stats['actualizados']}**")
+                    st.write(f"  Artículos insertados: **{stats['insertados']}**  |  Artículos actualizados: **{stats['actualizados']}**  |  Sin cambios: **{stats['sin_cambios']}**")
 
         except Exception as e:
             st.error(f"Ocurrió un error al procesar el archivo o al actualizar la base de datos: {e}")
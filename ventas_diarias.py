@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+"""
+Tabla de hechos de ventas diarias, mantenida de forma incremental.
+
+ventas_diarias: una fila por (fecha_retiro, cliente_id, articulo_id) con las unidades
+vendidas, la venta y la utilidad (misma regla que ganancias.calcular_ganancias) y la
+cantidad de remitos que aportan a esa fila.
+ventas_diarias_clientes: una fila por (fecha_retiro, cliente_id) con la cantidad de
+remitos cerrados, para poder contar remitos por día o por cliente sin volver a leerlos.
+ventas_diarias_meses: marca de última modificación por mes; informes la usa para saber
+si puede reutilizar los totales ya calculados de un mes cerrado.
+
+Las funciones de models que cierran, reabren, modifican o eliminan remitos llaman a
+recalcular_remito dentro de su propia transacción; las que cambian el costo de un
+artículo o el descuento de un cliente llaman a recalcular_articulos / recalcular_cliente.
+
+Uso por línea de comandos (desde la carpeta del proyecto):
+    python ventas_diarias.py --rebuild   -> reconstruye ambas tablas desde los remitos
+"""
+import sys
+import datetime
+from sqlalchemy import text
+from ganancias import VENDIDOS_SQL, VENTA_SQL, UTILIDAD_SQL
+
+# Advisory lock que serializa el mantenimiento (evita choques de clave entre dos
+# transacciones que recalculan el mismo cliente y fecha)
+VENTAS_DIARIAS_LOCK_ID = 20260110
+
+CREATE_SQL = [
+    """
+    CREATE TABLE IF NOT EXISTS ventas_diarias (
+        fecha_retiro DATE NOT NULL,
+        cliente_id INTEGER NOT NULL,
+        articulo_id INTEGER NOT NULL,
+        vendidos BIGINT NOT NULL DEFAULT 0,
+        venta DOUBLE PRECISION NOT NULL DEFAULT 0,
+        utilidad DOUBLE PRECISION NOT NULL DEFAULT 0,
+        remitos INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (fecha_retiro, cliente_id, articulo_id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_ventas_diarias_cliente ON ventas_diarias (cliente_id)",
+    "CREATE INDEX IF NOT EXISTS idx_ventas_diarias_articulo ON ventas_diarias (articulo_id)",
+    """
+    CREATE TABLE IF NOT EXISTS ventas_diarias_clientes (
+        fecha_retiro DATE NOT NULL,
+        cliente_id INTEGER NOT NULL,
+        remitos INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (fecha_retiro, cliente_id)
+    )
+    """,
+]
+
+CREATE_MESES_SQL = [
+    """
+    CREATE TABLE IF NOT EXISTS ventas_diarias_meses (
+        mes DATE PRIMARY KEY,
+        actualizado TIMESTAMP NOT NULL
+    )
+    """,
+]
+
+# Marca como modificados los meses que contienen las fechas indicadas
+_MARCAR_MESES_SQL = """
+    INSERT INTO ventas_diarias_meses (mes, actualizado)
+    SELECT m.mes, clock_timestamp()
+    FROM (SELECT DISTINCT CAST(date_trunc('month', {columna}) AS DATE) AS mes FROM {origen}) m
+    ON CONFLICT (mes) DO UPDATE SET actualizado = EXCLUDED.actualizado
+"""
+
+_INSERT_HECHOS_SQL = f"""
+    INSERT INTO ventas_diarias (fecha_retiro, cliente_id, articulo_id, vendidos, venta, utilidad, remitos)
+    SELECT r.fecha_retiro, r.cliente_id, ri.articulo_id,
+           SUM({VENDIDOS_SQL}), SUM({VENTA_SQL}), SUM({UTILIDAD_SQL}), COUNT(DISTINCT r.id)
+    FROM remitos r
+    JOIN clientes c ON r.cliente_id = c.id
+    JOIN remito_items ri ON r.id = ri.remito_id
+    JOIN articulos a ON ri.articulo_id = a.id
+    WHERE r.fecha_retiro IS NOT NULL {{filtro}}
+    GROUP BY r.fecha_retiro, r.cliente_id, ri.articulo_id
+"""
+
+_INSERT_CLIENTES_SQL = """
+    INSERT INTO ventas_diarias_clientes (fecha_retiro, cliente_id, remitos)
+    SELECT r.fecha_retiro, r.cliente_id, COUNT(*)
+    FROM remitos r
+    WHERE r.fecha_retiro IS NOT NULL
+      AND EXISTS (SELECT 1 FROM remito_items ri WHERE ri.remito_id = r.id) {filtro}
+    GROUP BY r.fecha_retiro, r.cliente_id
+"""
+
+# Sentencias de la reconstrucción completa (también las usa la migración que crea las tablas)
+REBUILD_SQL = [
+    "DELETE FROM ventas_diarias",
+    "DELETE FROM ventas_diarias_clientes",
+    _INSERT_HECHOS_SQL.format(filtro=""),
+    _INSERT_CLIENTES_SQL.format(filtro=""),
+]
+
+# Marcar todos los meses (los que ya tenían marca y los que tienen ventas)
+MARCAR_TODOS_SQL = [
+    "UPDATE ventas_diarias_meses SET actualizado = clock_timestamp()",
+    _MARCAR_MESES_SQL.format(columna="fecha_retiro", origen="ventas_diarias"),
+]
+
+def _lock(conn):
+    conn.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {"lock_id": VENTAS_DIARIAS_LOCK_ID})
+
+def _marcar_meses(conn, filtro="", params=None):
+    """Marca como modificados los meses con filas de ventas_diarias que cumplen el filtro."""
+    origen = f"ventas_diarias WHERE TRUE {filtro}"
+    conn.execute(text(_MARCAR_MESES_SQL.format(columna="fecha_retiro", origen=origen)), params or {})
+
+def _como_fecha(valor):
+    """Normaliza date / datetime / Timestamp / 'AAAA-MM-DD' a datetime.date."""
+    if isinstance(valor, datetime.datetime):
+        return valor.date()
+    if isinstance(valor, datetime.date):
+        return valor
+    return datetime.date.fromisoformat(str(valor)[:10])
+
+def recalcular_remito(conn, cliente_id, fechas_retiro):
+    """
+    Recalcula las filas del cliente para las fechas de retiro indicadas (la anterior
+    y la nueva del remito modificado). Las fechas None se ignoran.
+    """
+    fechas = sorted({_como_fecha(f) for f in fechas_retiro if f is not None})
+    if not fechas:
+        return
+    params = {"cid": int(cliente_id), "fechas": fechas}
+    _lock(conn)
+    conn.execute(text("DELETE FROM ventas_diarias WHERE cliente_id = :cid AND fecha_retiro = ANY(:fechas)"), params)
+    conn.execute(text("DELETE FROM ventas_diarias_clientes WHERE cliente_id = :cid AND fecha_retiro = ANY(:fechas)"), params)
+    filtro = "AND r.cliente_id = :cid AND r.fecha_retiro = ANY(:fechas)"
+    conn.execute(text(_INSERT_HECHOS_SQL.format(filtro=filtro)), params)
+    conn.execute(text(_INSERT_CLIENTES_SQL.format(filtro=filtro)), params)
+    conn.execute(text(_MARCAR_MESES_SQL.format(columna="f", origen="unnest(CAST(:fechas AS DATE[])) AS f")), params)
+
+def recalcular_cliente(conn, cliente_id):
+    """Recalcula todas las filas de un cliente (por ejemplo, si cambió su porcentaje de descuento)."""
+    params = {"cid": int(cliente_id)}
+    _lock(conn)
+    _marcar_meses(conn, "AND cliente_id = :cid", params)
+    conn.execute(text("DELETE FROM ventas_diarias WHERE cliente_id = :cid"), params)
+    conn.execute(text(_INSERT_HECHOS_SQL.format(filtro="AND r.cliente_id = :cid")), params)
+    _marcar_meses(conn, "AND cliente_id = :cid", params)
+
+def recalcular_articulos(conn, articulo_ids):
+    """Recalcula todas las filas de los artículos indicados (por ejemplo, si cambió su costo)."""
+    ids = sorted({int(i) for i in articulo_ids})
+    if not ids:
+        return
+    params = {"ids": ids}
+    _lock(conn)
+    _marcar_meses(conn, "AND articulo_id = ANY(:ids)", params)
+    conn.execute(text("DELETE FROM ventas_diarias WHERE articulo_id = ANY(:ids)"), params)
+    conn.execute(text(_INSERT_HECHOS_SQL.format(filtro="AND ri.articulo_id = ANY(:ids)")), params)
+    _marcar_meses(conn, "AND articulo_id = ANY(:ids)", params)
+
+def reconstruir(conn):
+    """Reconstruye ambas tablas desde cero. Retorna la cantidad de filas de ventas_diarias."""
+    _lock(conn)
+    for sql in REBUILD_SQL + MARCAR_TODOS_SQL:
+        conn.execute(text(sql))
+    return conn.execute(text("SELECT COUNT(*) FROM ventas_diarias")).scalar()
+
+if __name__ == "__main__":
+    from models import engine
+
+    if "--rebuild" in sys.argv:
+        with engine.begin() as conn:
+            filas = reconstruir(conn)
+        print(f"ventas_diarias reconstruida: {filas} filas")
+    else:
+        print(__doc__)